@@ -0,0 +1,66 @@
+"""fsm_storage_generated_id_columns
+
+Revision ID: 30ca2f0f8f63
+Revises: 6742ea75bc5f
+Create Date: 2026-10-16 14:36:20.802117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '30ca2f0f8f63'
+down_revision: Union[str, Sequence[str], None] = '6742ea75bc5f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# storage_key имеет вид "bot_id:chat_id:user_id" (PostgresFSMStorage._make_key)
+KEY_PARTS = {
+    'bot_id': 1,
+    'chat_id': 2,
+    'user_id': 3,
+}
+
+
+def _key_part(position: int) -> str:
+    return f"CAST(NULLIF(split_part(storage_key, ':', {position}), '') AS BIGINT)"
+
+
+def _create_active_index() -> None:
+    op.execute(
+        "CREATE INDEX idx_fsm_storage_active "
+        "ON fsm_storage (user_id, updated_at DESC) INCLUDE (state) "
+        "WHERE state IS NOT NULL"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # bot_id/chat_id/user_id дублировали storage_key и требовали синхронизации
+    # на стороне приложения. Теперь PostgreSQL вычисляет их сам.
+    # Существующий столбец нельзя сделать генерируемым — пересоздаём его;
+    # индекс по user_id удаляется вместе со столбцом и строится заново.
+    op.execute("DROP INDEX IF EXISTS idx_fsm_storage_active")
+    for column, position in KEY_PARTS.items():
+        op.drop_column('fsm_storage', column)
+        op.add_column('fsm_storage', sa.Column(
+            column, sa.BigInteger, sa.Computed(_key_part(position), persisted=True), nullable=True
+        ))
+    _create_active_index()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_fsm_storage_active")
+    for column in KEY_PARTS:
+        op.drop_column('fsm_storage', column)
+        op.add_column('fsm_storage', sa.Column(column, sa.BigInteger, nullable=True))
+    op.execute(
+        "UPDATE fsm_storage SET "
+        + ", ".join(f"{column} = {_key_part(position)}" for column, position in KEY_PARTS.items())
+    )
+    _create_active_index()
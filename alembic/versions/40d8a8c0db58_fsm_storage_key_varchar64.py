@@ -0,0 +1,33 @@
+"""fsm_storage_key_varchar64
+
+Revision ID: 40d8a8c0db58
+Revises: 4cf754b1e2d9
+Create Date: 2026-10-16 13:34:12.640981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '40d8a8c0db58'
+down_revision: Union[str, Sequence[str], None] = '4cf754b1e2d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Ключ "bot_id:chat_id:user_id" — три BIGINT (до 20 символов каждый) и два
+    # разделителя, т.е. не длиннее 62 символов. Узкий первичный ключ — больше
+    # ключей на страницу btree и меньше промахов кэша при поиске.
+    op.alter_column('fsm_storage', 'storage_key',
+                    type_=sa.String(64), existing_type=sa.String(255), existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('fsm_storage', 'storage_key',
+                    type_=sa.String(255), existing_type=sa.String(64), existing_nullable=False)
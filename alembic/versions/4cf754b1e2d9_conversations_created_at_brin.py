@@ -0,0 +1,35 @@
+"""conversations_created_at_brin
+
+Revision ID: 4cf754b1e2d9
+Revises: f1afa4cba29d
+Create Date: 2026-10-16 13:21:49.087615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4cf754b1e2d9'
+down_revision: Union[str, Sequence[str], None] = 'f1afa4cba29d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Выборки и очистка по диапазону created_at (аналитика, архивация старых сессий).
+    # Строки дописываются в порядке времени, поэтому BRIN хватает min/max на блок
+    # страниц: индекс крошечный и почти не удорожает вставку, в отличие от btree.
+    # CONCURRENTLY для секционированной таблицы не поддерживается.
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_conversations_created_brin "
+        "ON conversations USING BRIN (created_at) WITH (pages_per_range = 32)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_conversations_created_brin")
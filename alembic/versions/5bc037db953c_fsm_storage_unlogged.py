@@ -0,0 +1,32 @@
+"""fsm_storage_unlogged
+
+Revision ID: 5bc037db953c
+Revises: 40d8a8c0db58
+Create Date: 2026-10-16 13:46:38.225710
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5bc037db953c'
+down_revision: Union[str, Sequence[str], None] = '40d8a8c0db58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Состояние FSM эфемерно: каждое сообщение пользователя переписывает строку,
+    # а WAL для неё не нужен. После аварийного перезапуска PostgreSQL таблица
+    # окажется пустой — пользователи просто вернутся в главное меню.
+    # Не реплицируется на standby.
+    op.execute("ALTER TABLE fsm_storage SET UNLOGGED")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE fsm_storage SET LOGGED")
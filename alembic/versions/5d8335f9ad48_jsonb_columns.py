@@ -0,0 +1,47 @@
+"""jsonb_columns
+
+Revision ID: 5d8335f9ad48
+Revises: e1ca94338e41
+Create Date: 2026-10-16 11:41:07.556120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8335f9ad48'
+down_revision: Union[str, Sequence[str], None] = 'e1ca94338e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # json хранится как текст и парсится при каждом чтении; jsonb — уже разобранный документ
+    op.alter_column('conversations', 'metadata',
+                    type_=JSONB, existing_type=sa.JSON, existing_nullable=True,
+                    postgresql_using='metadata::jsonb')
+
+    # Default '{}' типа json нельзя автоматически привести к jsonb — пересоздаём его
+    op.alter_column('fsm_storage', 'data', server_default=None)
+    op.alter_column('fsm_storage', 'data',
+                    type_=JSONB, existing_type=sa.JSON, existing_nullable=False,
+                    postgresql_using='data::jsonb')
+    op.alter_column('fsm_storage', 'data', server_default=sa.text("'{}'::jsonb"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('fsm_storage', 'data', server_default=None)
+    op.alter_column('fsm_storage', 'data',
+                    type_=sa.JSON, existing_type=JSONB, existing_nullable=False,
+                    postgresql_using='data::json')
+    op.alter_column('fsm_storage', 'data', server_default='{}')
+
+    op.alter_column('conversations', 'metadata',
+                    type_=sa.JSON, existing_type=JSONB, existing_nullable=True,
+                    postgresql_using='metadata::json')
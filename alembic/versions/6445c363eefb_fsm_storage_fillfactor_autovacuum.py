@@ -0,0 +1,43 @@
+"""fsm_storage_fillfactor_autovacuum
+
+Revision ID: 6445c363eefb
+Revises: 5bc037db953c
+Create Date: 2026-10-16 13:58:04.918443
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6445c363eefb'
+down_revision: Union[str, Sequence[str], None] = '5bc037db953c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Строка пользователя переписывается на каждом шаге диалога. Свободное место
+    # на странице позволяет новой версии строки остаться на той же странице,
+    # а частый autovacuum не даёт таблице раздуваться.
+    # Полноценного HOT пока нет: updated_at входит в idx_fsm_storage_active,
+    # и его изменение требует новой записи в индексе.
+    op.execute(
+        "ALTER TABLE fsm_storage SET ("
+        "fillfactor = 70, "
+        "autovacuum_vacuum_scale_factor = 0.05, "
+        "autovacuum_analyze_scale_factor = 0.02)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "ALTER TABLE fsm_storage RESET ("
+        "fillfactor, "
+        "autovacuum_vacuum_scale_factor, "
+        "autovacuum_analyze_scale_factor)"
+    )
@@ -0,0 +1,52 @@
+"""conversations_enum_types
+
+Revision ID: 6742ea75bc5f
+Revises: 6445c363eefb
+Create Date: 2026-10-16 14:11:45.371208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ENUM
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6742ea75bc5f'
+down_revision: Union[str, Sequence[str], None] = '6445c363eefb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Значения ProviderType (app/providers/base.py) и ролей AIMessage.
+# Новый провайдер потребует миграции с ALTER TYPE ... ADD VALUE.
+provider_type_enum = ENUM('openai', 'claude', 'gemini', 'yandex',
+                          name='provider_type_enum', create_type=False)
+role_enum = ENUM('system', 'user', 'assistant', name='role_enum', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 4 байта на значение вместо строки переменной длины в каждой строке
+    # и в ключах idx_conversations_active
+    op.execute("CREATE TYPE provider_type_enum AS ENUM ('openai', 'claude', 'gemini', 'yandex')")
+    op.execute("CREATE TYPE role_enum AS ENUM ('system', 'user', 'assistant')")
+    op.alter_column('conversations', 'provider_type',
+                    type_=provider_type_enum, existing_type=sa.String(50), existing_nullable=False,
+                    postgresql_using='provider_type::provider_type_enum')
+    op.alter_column('conversations', 'role',
+                    type_=role_enum, existing_type=sa.String(50), existing_nullable=False,
+                    postgresql_using='role::role_enum')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('conversations', 'role',
+                    type_=sa.String(50), existing_type=role_enum, existing_nullable=False,
+                    postgresql_using='role::text')
+    op.alter_column('conversations', 'provider_type',
+                    type_=sa.String(50), existing_type=provider_type_enum, existing_nullable=False,
+                    postgresql_using='provider_type::text')
+    op.execute("DROP TYPE role_enum")
+    op.execute("DROP TYPE provider_type_enum")
@@ -0,0 +1,161 @@
+"""conversations_partition_by_month
+
+Revision ID: 7b6c2757d660
+Revises: d0a78dc66117
+Create Date: 2026-10-16 12:37:45.671093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b6c2757d660'
+down_revision: Union[str, Sequence[str], None] = 'd0a78dc66117'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Создаёт (если ещё нет) месячную секцию conversations_yYYYYmMM для момента ts.
+# Границы месяцев считаются в UTC, чтобы не зависеть от timezone сессии.
+# Вызывается при миграции и периодически из бота (app/repositories/conversations.py).
+ENSURE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION conversations_ensure_partition(ts timestamptz)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start timestamp := date_trunc('month', ts AT TIME ZONE 'UTC');
+    partition_name text := 'conversations_' || to_char(month_start, '"y"YYYY"m"MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF conversations FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        month_start AT TIME ZONE 'UTC',
+        (month_start + interval '1 month') AT TIME ZONE 'UTC'
+    );
+END
+$$;
+"""
+
+# Тот же выбор сжатия content, что и в ревизии e1ca94338e41
+CONTENT_COMPRESSION = """
+DO $$
+BEGIN
+    IF current_setting('server_version_num')::int >= 140000 THEN
+        BEGIN
+            EXECUTE 'ALTER TABLE conversations ALTER COLUMN content SET COMPRESSION lz4';
+            RETURN;
+        EXCEPTION WHEN feature_not_supported THEN
+            NULL;
+        END;
+    END IF;
+    ALTER TABLE conversations ALTER COLUMN content SET STORAGE EXTERNAL;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Переносим данные в секционированную по месяцам created_at таблицу.
+    # Горячие запросы работают со свежими сообщениями, а старые месяцы
+    # можно архивировать через DETACH PARTITION вместо DELETE.
+    op.execute("ALTER TABLE conversations RENAME TO conversations_legacy")
+    op.execute("DROP INDEX IF EXISTS idx_conversations_active")
+    # Сохраняем последовательность id, чтобы идентификаторы не начинались заново
+    op.execute("ALTER SEQUENCE conversations_id_seq OWNED BY NONE")
+
+    # Ключ секционирования обязан входить в первичный ключ
+    op.execute(
+        """
+        CREATE TABLE conversations (
+            id BIGINT NOT NULL DEFAULT nextval('conversations_id_seq'),
+            user_id BIGINT NOT NULL,
+            provider_type VARCHAR(50) NOT NULL,
+            role VARCHAR(50) NOT NULL,
+            content TEXT NOT NULL,
+            metadata JSONB,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            finished_at TIMESTAMPTZ,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    # Страховочная секция: вставка не упадёт, даже если месячную секцию не успели создать
+    op.execute("CREATE TABLE conversations_default PARTITION OF conversations DEFAULT")
+    op.execute(ENSURE_PARTITION_FUNCTION)
+    # Секции на весь диапазон существующих данных, текущий и следующий месяц
+    op.execute(
+        """
+        SELECT conversations_ensure_partition(m AT TIME ZONE 'UTC')
+        FROM generate_series(
+            date_trunc('month', COALESCE((SELECT min(created_at) FROM conversations_legacy), now()) AT TIME ZONE 'UTC'),
+            (now() + interval '1 month') AT TIME ZONE 'UTC',
+            interval '1 month'
+        ) AS m
+        """
+    )
+    op.execute(CONTENT_COMPRESSION)
+
+    op.execute(
+        """
+        INSERT INTO conversations (id, user_id, provider_type, role, content, metadata, created_at, finished_at)
+        SELECT id, user_id, provider_type, role, content, metadata, created_at, finished_at
+        FROM conversations_legacy
+        """
+    )
+    op.execute("DROP TABLE conversations_legacy")
+    op.execute("ALTER SEQUENCE conversations_id_seq OWNED BY conversations.id")
+
+    # Индекс на секционированной таблице создаётся в каждой секции автоматически
+    op.execute(
+        "CREATE INDEX idx_conversations_active "
+        "ON conversations (user_id, provider_type, created_at) "
+        "WHERE finished_at IS NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE conversations RENAME TO conversations_partitioned")
+    op.execute("DROP INDEX IF EXISTS idx_conversations_active")
+    op.execute("ALTER SEQUENCE conversations_id_seq OWNED BY NONE")
+
+    op.execute(
+        """
+        CREATE TABLE conversations (
+            id BIGINT NOT NULL DEFAULT nextval('conversations_id_seq') PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            provider_type VARCHAR(50) NOT NULL,
+            role VARCHAR(50) NOT NULL,
+            content TEXT NOT NULL,
+            metadata JSONB,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            finished_at TIMESTAMPTZ
+        )
+        """
+    )
+    op.execute(CONTENT_COMPRESSION)
+    op.execute(
+        """
+        INSERT INTO conversations (id, user_id, provider_type, role, content, metadata, created_at, finished_at)
+        SELECT id, user_id, provider_type, role, content, metadata, created_at, finished_at
+        FROM conversations_partitioned
+        """
+    )
+    # Удаление секционированной таблицы удаляет и все её секции
+    op.execute("DROP TABLE conversations_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS conversations_ensure_partition(timestamptz)")
+    op.execute("ALTER SEQUENCE conversations_id_seq OWNED BY conversations.id")
+
+    op.execute(
+        "CREATE INDEX idx_conversations_active "
+        "ON conversations (user_id, provider_type, created_at) "
+        "WHERE finished_at IS NULL"
+    )
@@ -0,0 +1,45 @@
+"""conversations_active_partial_index
+
+Revision ID: 8149a31e17b6
+Revises: b66012ceafd1
+Create Date: 2026-10-16 11:02:14.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8149a31e17b6'
+down_revision: Union[str, Sequence[str], None] = 'b66012ceafd1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Все горячие запросы PostgresStorage (get_history, clear_history, подсчёт)
+    # работают только с активной сессией: finished_at IS NULL.
+    # Индексируем только её, а не всю историю диалогов.
+    # content в INCLUDE не добавляем: системные промпты занимают несколько КБ
+    # и не помещаются в строку btree-индекса.
+    # CONCURRENTLY не блокирует запись в таблицу, но требует работы вне транзакции.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conversations_active "
+            "ON conversations (user_id, provider_type, created_at) "
+            "WHERE finished_at IS NULL"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_conversations_user_provider")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conversations_user_provider "
+            "ON conversations (user_id, provider_type, finished_at, created_at)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_conversations_active")
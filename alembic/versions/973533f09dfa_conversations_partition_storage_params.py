@@ -0,0 +1,80 @@
+"""conversations_partition_storage_params
+
+Revision ID: 973533f09dfa
+Revises: 30ca2f0f8f63
+Create Date: 2026-10-16 14:52:07.163554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '973533f09dfa'
+down_revision: Union[str, Sequence[str], None] = '30ca2f0f8f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Секционированной таблице нельзя задать параметры хранения — они задаются
+# каждой секции: существующим здесь, новым — в conversations_ensure_partition.
+# Массовую загрузку истории делать через COPY (asyncpg copy_records_to_table),
+# а не построчными INSERT.
+STORAGE_PARAMS = "parallel_workers = 4, autovacuum_vacuum_scale_factor = 0.02"
+
+ENSURE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION conversations_ensure_partition(ts timestamptz)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start timestamp := date_trunc('month', ts AT TIME ZONE 'UTC');
+    partition_name text := 'conversations_' || to_char(month_start, '"y"YYYY"m"MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF conversations FOR VALUES FROM (%L) TO (%L)%s',
+        partition_name,
+        month_start AT TIME ZONE 'UTC',
+        (month_start + interval '1 month') AT TIME ZONE 'UTC',
+        {with_clause}
+    );
+END
+$$;
+"""
+
+
+def _set_partitions(action: str) -> None:
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            part regclass;
+        BEGIN
+            FOR part IN SELECT inhrelid::regclass FROM pg_inherits
+                        WHERE inhparent = 'conversations'::regclass
+            LOOP
+                EXECUTE format('ALTER TABLE %s {action}', part);
+            END LOOP;
+        END
+        $$;
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Параллельное чтение больших секций и более частый autovacuum
+    # после массовой загрузки
+    op.execute(ENSURE_PARTITION_FUNCTION.format(with_clause=f"' WITH ({STORAGE_PARAMS})'"))
+    _set_partitions(f"SET ({STORAGE_PARAMS})")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(ENSURE_PARTITION_FUNCTION.format(with_clause="''"))
+    _set_partitions("RESET (parallel_workers, autovacuum_vacuum_scale_factor)")
@@ -0,0 +1,109 @@
+"""conversations_partition_from_default
+
+Revision ID: a3e91c5f2b74
+Revises: 973533f09dfa
+Create Date: 2026-10-16 16:05:41.208317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3e91c5f2b74'
+down_revision: Union[str, Sequence[str], None] = '973533f09dfa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Те же параметры хранения секций, что и в ревизии 973533f09dfa
+STORAGE_PARAMS = "parallel_workers = 4, autovacuum_vacuum_scale_factor = 0.02"
+
+# Если строки месяца уже попали в conversations_default (задача не отработала,
+# бот простаивал на границе месяцев, сдвинулись часы), CREATE TABLE ... PARTITION OF
+# для этого месяца падает на каждом запуске. Поэтому секция создаётся отдельной
+# таблицей, строки месяца переносятся в неё из DEFAULT, и только затем она
+# присоединяется — всё в одной транзакции вызова функции.
+ENSURE_PARTITION_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION conversations_ensure_partition(ts timestamptz)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start timestamp := date_trunc('month', ts AT TIME ZONE 'UTC');
+    range_from timestamptz := month_start AT TIME ZONE 'UTC';
+    range_to timestamptz := (month_start + interval '1 month') AT TIME ZONE 'UTC';
+    partition_name text := 'conversations_' || to_char(month_start, '"y"YYYY"m"MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    -- Пока секция не присоединена, новые строки месяца не должны попасть в DEFAULT
+    LOCK TABLE conversations_default IN SHARE ROW EXCLUSIVE MODE;
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE conversations INCLUDING ALL) WITH ({STORAGE_PARAMS})',
+        partition_name
+    );
+    EXECUTE format(
+        'WITH moved AS ('
+        || 'DELETE FROM conversations_default WHERE created_at >= %L AND created_at < %L RETURNING *'
+        || ') INSERT INTO %I SELECT * FROM moved',
+        range_from,
+        range_to,
+        partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE conversations ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        range_from,
+        range_to
+    );
+END
+$$;
+"""
+
+# Версия функции из ревизии 973533f09dfa
+PREVIOUS_ENSURE_PARTITION_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION conversations_ensure_partition(ts timestamptz)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start timestamp := date_trunc('month', ts AT TIME ZONE 'UTC');
+    partition_name text := 'conversations_' || to_char(month_start, '"y"YYYY"m"MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF conversations FOR VALUES FROM (%L) TO (%L)%s',
+        partition_name,
+        month_start AT TIME ZONE 'UTC',
+        (month_start + interval '1 month') AT TIME ZONE 'UTC',
+        ' WITH ({STORAGE_PARAMS})'
+    );
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(ENSURE_PARTITION_FUNCTION)
+    # Разбираем то, что уже скопилось в DEFAULT: по секции на каждый такой месяц
+    op.execute(
+        """
+        SELECT conversations_ensure_partition(m AT TIME ZONE 'UTC')
+        FROM (
+            SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') AS m
+            FROM conversations_default
+        ) AS months
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(PREVIOUS_ENSURE_PARTITION_FUNCTION)
@@ -0,0 +1,30 @@
+"""conversations_rename_metadata_to_meta
+
+Revision ID: cb313858001c
+Revises: 7b6c2757d660
+Create Date: 2026-10-16 12:58:03.200098
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cb313858001c'
+down_revision: Union[str, Sequence[str], None] = '7b6c2757d660'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Имя metadata конфликтует с DeclarativeBase.metadata в SQLAlchemy ORM;
+    # на секционированной таблице переименование распространяется на все секции
+    op.alter_column('conversations', 'metadata', new_column_name='meta')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('conversations', 'meta', new_column_name='metadata')
@@ -0,0 +1,41 @@
+"""fsm_storage_active_partial_index
+
+Revision ID: d0a78dc66117
+Revises: 5d8335f9ad48
+Create Date: 2026-10-16 11:58:33.104871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0a78dc66117'
+down_revision: Union[str, Sequence[str], None] = '5d8335f9ad48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Поиск по user_id нужен только для пользователей с активным состоянием FSM;
+    # записи с пустым состоянием (большинство) в индекс не попадают
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_fsm_storage_active "
+            "ON fsm_storage (user_id, updated_at DESC) INCLUDE (state) "
+            "WHERE state IS NOT NULL"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_fsm_storage_user")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_fsm_storage_user "
+            "ON fsm_storage (user_id, updated_at)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_fsm_storage_active")
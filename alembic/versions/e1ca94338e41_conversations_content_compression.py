@@ -0,0 +1,59 @@
+"""conversations_content_compression
+
+Revision ID: e1ca94338e41
+Revises: 8149a31e17b6
+Create Date: 2026-10-16 11:24:51.902344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1ca94338e41'
+down_revision: Union[str, Sequence[str], None] = '8149a31e17b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # PG14+: сжимаем content через lz4 вместо pglz (заметно дешевле по CPU).
+    # Старые версии или сборка без lz4: отключаем сжатие (STORAGE EXTERNAL),
+    # крупные значения по-прежнему уходят в TOAST.
+    # Проверка выполняется на стороне сервера, поэтому работает и в offline-режиме.
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF current_setting('server_version_num')::int >= 140000 THEN
+                BEGIN
+                    EXECUTE 'ALTER TABLE conversations ALTER COLUMN content SET COMPRESSION lz4';
+                    RETURN;
+                EXCEPTION WHEN feature_not_supported THEN
+                    NULL;
+                END;
+            END IF;
+            ALTER TABLE conversations ALTER COLUMN content SET STORAGE EXTERNAL;
+        END
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF current_setting('server_version_num')::int >= 140000 THEN
+                EXECUTE 'ALTER TABLE conversations ALTER COLUMN content SET COMPRESSION default';
+            END IF;
+            ALTER TABLE conversations ALTER COLUMN content SET STORAGE EXTENDED;
+        END
+        $$;
+        """
+    )
@@ -0,0 +1,31 @@
+"""conversations_id_seq_cache
+
+Revision ID: f1afa4cba29d
+Revises: cb313858001c
+Create Date: 2026-10-16 13:10:27.514302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1afa4cba29d'
+down_revision: Union[str, Sequence[str], None] = 'cb313858001c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Каждое соединение резервирует сразу 1000 значений id и не обращается
+    # к последовательности на каждую вставку. Цена — пропуски в id при
+    # переподключениях; порядок сообщений определяется created_at, а не id.
+    op.execute("ALTER SEQUENCE conversations_id_seq CACHE 1000")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER SEQUENCE conversations_id_seq CACHE 1")
@@ -142,15 +142,17 @@ class CareerDialogConfig:
     
     # Сообщения об ошибках
     ERROR_AI_REQUEST = "🤖 *Максим временно недоступен.* Попробуй позже или начни заново."
-    ERROR_DIALOGUE_REVIEW = "⚠️ *Не удалось проанализировать беседу:* {error_message}. Попробуй новую карьерную беседу."
-    ERROR_SHORT_DIALOGUE = "📝 *Беседа слишком короткая* для полноценного анализа. Попробуй поговорить с Максимом подольше."
+    # Тексты анализа отправляются с parse_mode="HTML": ответ рецензента экранируется, а не ломает разметку
+    ERROR_DIALOGUE_REVIEW = "⚠️ <b>Не удалось проанализировать беседу:</b> {error_message}. Попробуй новую карьерную беседу."
+    ERROR_DIALOGUE_REVIEW_FMT = ERROR_DIALOGUE_REVIEW.format  # связанный format, берётся один раз
+    ERROR_SHORT_DIALOGUE = "📝 <b>Беседа слишком короткая</b> для полноценного анализа. Попробуй поговорить с Максимом подольше."
     
     # Сообщение после завершения рецензирования
-    AFTER_REVIEW_MESSAGE = """🎓 *Анализ карьерной беседы готов!*
+    AFTER_REVIEW_MESSAGE = """🎓 <b>Анализ карьерной беседы готов!</b>
 
 💡 Изучи рекомендации выше — они помогут тебе лучше мотивировать и развивать сотрудников.
 
-🔄 *Попробуем еще раз?* Нажми «Начать заново»!"""
+🔄 <b>Попробуем еще раз?</b> Нажми «Начать заново»!"""
     
     # Промпт для пользователя
     USER_PROMPT_TEMPLATE = """Руководитель сказал:
@@ -184,11 +186,12 @@ class CareerDialogConfig:
 - Не пиши никакого текста вне JSON. Только валидный JSON-объект.
 - Говори на "ты" с руководителем."""
     
-    # Заголовки для финального отзыва
-    REVIEW_TITLE = "🎓 *АНАЛИЗ КАРЬЕРНОГО ДИАЛОГА*\n"
-    REVIEW_OVERALL_LABEL = "📋 *Общая оценка:* {overall}\n"
-    REVIEW_GOOD_POINTS_LABEL = "✅ *Что получилось хорошо:*"
-    REVIEW_IMPROVEMENT_LABEL = "💡 *Что можно улучшить:*"
+    # Заголовки для финального отзыва (HTML)
+    REVIEW_TITLE = "🎓 <b>АНАЛИЗ КАРЬЕРНОГО ДИАЛОГА</b>\n"
+    REVIEW_OVERALL_LABEL = "📋 <b>Общая оценка:</b> {overall}\n"
+    REVIEW_OVERALL_FMT = REVIEW_OVERALL_LABEL.format
+    REVIEW_GOOD_POINTS_LABEL = "✅ <b>Что получилось хорошо:</b>"
+    REVIEW_IMPROVEMENT_LABEL = "💡 <b>Что можно улучшить:</b>"
     REVIEW_RESTART_MESSAGE = "Хочешь пройти ещё раз — нажми «Начать заново», или вернись в меню."
     
     # Лейблы для анализа компонентов карьерного диалога
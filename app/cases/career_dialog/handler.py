@@ -4,6 +4,7 @@
 запуск по кнопке меню и поддержку голосовых сообщений.
 """
 
+import html
 import json
 import logging
 import asyncio
@@ -12,7 +13,14 @@ from aiogram import Router, F
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove, FSInputFile
+
+try:
+    # C-парсер: ответ ИИ разбирается на каждом ходе диалога
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 from app.services.transcription_service import transcribe_voice_ogg
 from app.services.validation_service import validator, ValidationError
@@ -49,6 +57,7 @@ from app.keyboards.menu import (
     disable_previous_buttons,
     remove_reply_keyboard,
     disable_buttons_by_id,
+    get_main_menu_inline,
 )
 from app.texts import Texts
 from .config import CareerDialogConfig
@@ -57,23 +66,84 @@ logger = logging.getLogger(__name__)
 router = Router(name="case_career_dialog")
 # Ключ для хранения id последнего сообщения с инлайн-кнопками в FSM
 ACTIVE_INLINE_MSG_ID_KEY = "active_inline_message_id"
+# Достигнутые компоненты карьерного диалога храним в FSM битовой маской (components_bitmap),
+# реплики диалога — списком dialogue_texts: реплики строго чередуются, роль определяется чётностью индекса
+# Рецензент работает в отдельной сессии: user_id пользователя + смещение
+REVIEWER_USER_ID_OFFSET = 999_999
+_COMPONENT_BITS = tuple((key, 1 << i) for i, key in enumerate(CareerDialogConfig.CAREER_LABELS))
+_ALL_COMPONENTS = (1 << len(_COMPONENT_BITS)) - 1
+# Таблица для строк анализа: (ключ, лейбл) и статус по bool-индексу
+_CAREER_LABELS_TUPLE = tuple(CareerDialogConfig.CAREER_LABELS.items())
+_STATUS = ("❌", "✅")
+_ROLES = ("Руководитель", "Максим")
+# Предел длины текста одного сообщения Telegram (в UTF-16 единицах)
+_TELEGRAM_TEXT_LIMIT = 4096
+# Клавиатуры кейса не зависят от пользователя — собираем их один раз при импорте
+_CONTROLS_MARKUP = get_case_controls_inline_by_case(CareerDialogConfig.CASE_ID)
+_AFTER_REVIEW_MARKUP = get_case_after_review_inline_by_case(CareerDialogConfig.CASE_ID)
+_AFTER_REVIEW_GENERIC_MARKUP = get_case_after_review_inline()
+_CONTROLS_REPLY_MARKUP = get_case_controls_reply()
+_REMOVE_KEYBOARD = ReplyKeyboardRemove()
+# Ссылки на фоновые задачи, чтобы их не собрал GC до завершения
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
+# Замки по пользователю: рецензия по кнопке выполняется один раз даже при двойном клике
+_REVIEW_LOCKS: dict[int, asyncio.Lock] = {}
+# Сколько нажатий держат или ждут замок; замок удаляется, только когда их не осталось
+_REVIEW_LOCK_USERS: dict[int, int] = {}
+# PDF-памятка: после первой загрузки переиспользуем file_id Telegram вместо повторной отправки файла
+_PDF_PATH = "static/pdfs/karierny_dialog.pdf"
+_PDF_CAPTION = "📚 *Памятка по карьерному диалогу*\n\nИзучи материал и применяй на практике!"
+_PDF_FILE_ID: str | None = None
+
+
+def _disable_buttons_in_background(bot, chat_id: int, message_id: int) -> None:
+    """Отключает кнопки старого инлайн-сообщения фоновой задачей, не задерживая ответ."""
+    # disable_buttons_by_id сам глушит ошибки Telegram, необработанных исключений в задаче не будет
+    task = asyncio.create_task(disable_buttons_by_id(bot, chat_id, message_id))
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
+async def _ack_callback(callback: CallbackQuery) -> None:
+    """Снимает «часики» с нажатой кнопки; устаревший callback не должен ронять обработчик."""
+    try:
+        await callback.answer()
+    except Exception:
+        pass
+
+
+def _html(value) -> str:
+    """Экранирует текст от AI для вставки в сообщение с parse_mode="HTML"."""
+    return html.escape(str(value), quote=False)
+
+
+def _log_failed_stats(results) -> None:
+    """Логирует ошибки из результатов asyncio.gather(..., return_exceptions=True)."""
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("Failed to update case stats: %s", result)
+
+
+def _extract_json_object(response_text: str, required_key: str) -> dict | None:
+    """Извлекает JSON-объект между первой '{' и последней '}' ответа."""
+    start_idx = response_text.find('{')
+    # Быстрый выход без разбора: нет JSON или в нём нет обязательного поля
+    if start_idx == -1 or f'"{required_key}"' not in response_text:
+        return None
+    end_idx = response_text.rfind('}', start_idx) + 1
+    if end_idx == 0:
+        return None
+    parsed = json_loads(response_text[start_idx:end_idx])
+    return parsed if isinstance(parsed, dict) else None
 
 
 def parse_ai_response(response_text: str) -> dict:
     """Парсит JSON ответ от ИИ с fallback на обычный текст."""
     try:
-        # Пытаемся найти JSON в ответе
-        start_idx = response_text.find('{')
-        end_idx = response_text.rfind('}') + 1
-        
-        if start_idx != -1 and end_idx > start_idx:
-            json_str = response_text[start_idx:end_idx]
-            parsed = json.loads(json_str)
-            
-            # Проверяем обязательные поля
-            if "ReplyText" in parsed:
-                return parsed
-                
+        parsed = _extract_json_object(response_text, "ReplyText")
+        # Проверяем обязательные поля
+        if parsed and "ReplyText" in parsed:
+            return parsed
     except (json.JSONDecodeError, ValueError) as e:
         logger.warning("Failed to parse AI JSON response: %s", e)
     
@@ -96,13 +166,10 @@ def format_career_response(parsed_response: dict, show_analysis: bool = False) -
         return f"{CareerDialogConfig.MAXIM_EMOJI} *Максим:* {reply_text}"
     
     # Для админов показываем анализ компонентов карьерного диалога
-    analysis_parts = []
-    
-    for key, label in CareerDialogConfig.CAREER_LABELS.items():
-        status = "✅" if parsed_response.get(key, False) else "❌"
-        analysis_parts.append(f"{status} {label}")
-    
-    analysis = "\n".join(analysis_parts)
+    analysis = "\n".join(
+        f"{_STATUS[bool(parsed_response.get(key, False))]} {label}"
+        for key, label in _CAREER_LABELS_TUPLE
+    )
     
     return f"""{CareerDialogConfig.MAXIM_EMOJI} *Максим:* {reply_text}
 
@@ -113,18 +180,10 @@ def format_career_response(parsed_response: dict, show_analysis: bool = False) -
 def parse_reviewer_response(response_text: str) -> dict:
     """Парсит JSON ответ от рецензента с fallback."""
     try:
-        # Пытаемся найти JSON в ответе
-        start_idx = response_text.find('{')
-        end_idx = response_text.rfind('}') + 1
-        
-        if start_idx != -1 and end_idx > start_idx:
-            json_str = response_text[start_idx:end_idx]
-            parsed = json.loads(json_str)
-            
-            # Проверяем обязательные поля
-            if "overall" in parsed:
-                return parsed
-                
+        parsed = _extract_json_object(response_text, "overall")
+        # Проверяем обязательные поля
+        if parsed and "overall" in parsed:
+            return parsed
     except (json.JSONDecodeError, ValueError) as e:
         logger.warning("Failed to parse reviewer JSON response: %s", e)
     
@@ -137,7 +196,7 @@ def parse_reviewer_response(response_text: str) -> dict:
 
 
 def format_review_response(parsed_review: dict) -> str:
-    """Форматирует финальный отзыв рецензента для пользователя."""
+    """Форматирует финальный отзыв рецензента для пользователя (HTML)."""
     overall = parsed_review.get("overall", "")
     good_points = parsed_review.get("goodPoints", [])
     improvement_points = parsed_review.get("improvementPoints", [])
@@ -145,19 +204,19 @@ def format_review_response(parsed_review: dict) -> str:
     # Формируем красивое сообщение
     message_parts = [
         CareerDialogConfig.REVIEW_TITLE,
-        CareerDialogConfig.REVIEW_OVERALL_LABEL.format(overall=overall)
+        CareerDialogConfig.REVIEW_OVERALL_FMT(overall=_html(overall))
     ]
     
     if good_points:
         message_parts.append(CareerDialogConfig.REVIEW_GOOD_POINTS_LABEL)
         for i, point in enumerate(good_points, 1):
-            message_parts.append(f"{i}. {point}")
+            message_parts.append(f"{i}. {_html(point)}")
         message_parts.append("")
     
     if improvement_points:
         message_parts.append(CareerDialogConfig.REVIEW_IMPROVEMENT_LABEL)
         for i, point in enumerate(improvement_points, 1):
-            message_parts.append(f"{i}. {point}")
+            message_parts.append(f"{i}. {_html(point)}")
         message_parts.append("")
     
     message_parts.append(CareerDialogConfig.REVIEW_RESTART_MESSAGE)
@@ -165,23 +224,38 @@ def format_review_response(parsed_review: dict) -> str:
     return "\n".join(message_parts)
 
 
-def extract_dialogue_text(dialogue_entries: list) -> str:
+def _components_bitmap(data: dict) -> int:
+    """Битовая маска достигнутых компонентов; для старых диалогов — из списка total_components_achieved."""
+    bitmap = data.get("components_bitmap")
+    if bitmap is not None:
+        return bitmap
+    achieved = data.get("total_components_achieved") or ()
+    return sum(bit for key, bit in _COMPONENT_BITS if key in achieved)
+
+
+def _dialogue_texts(data: dict) -> list:
+    """Реплики диалога из данных FSM.
+
+    Диалоги, начатые до перехода на dialogue_texts, хранят историю в dialogue_entries
+    ({"role", "text"}); реплики там так же чередуются, поэтому достаточно текстов.
+    """
+    texts = data.get("dialogue_texts")
+    if texts is not None:
+        return texts
+    return [entry.get("text", "") for entry in data.get("dialogue_entries", [])]
+
+
+def extract_dialogue_text(texts: list) -> str:
     """Извлекает только диалог для рецензента (без анализа компонентов)."""
-    dialogue_lines = []
-    for entry in dialogue_entries:
-        role = entry.get("role", "")
-        text = entry.get("text", "")
-        if role and text:
-            dialogue_lines.append(f"{role}: {text}")
-    return "\n\n".join(dialogue_lines)
+    return "\n\n".join(f"{_ROLES[i & 1]}: {text}" for i, text in enumerate(texts) if text)
 
 
-async def perform_dialogue_review(dialogue_entries: list, session_id: str) -> str:
+async def perform_dialogue_review(texts: list, user_id: int) -> str:
     """Вызывает рецензента для анализа завершенного диалога."""
     
     try:
         # Извлекаем чистый диалог без анализа компонентов
-        dialogue_text = extract_dialogue_text(dialogue_entries)
+        dialogue_text = extract_dialogue_text(texts)
         
         if not dialogue_text.strip():
             return CareerDialogConfig.ERROR_SHORT_DIALOGUE
@@ -191,14 +265,15 @@ async def perform_dialogue_review(dialogue_entries: list, session_id: str) -> st
         
         # Отправляем на новую сессию рецензента
         logger.info(
-            "Reviewer call: session=%s_review, dialogue_len=%d, prompt_len=%d",
-            session_id,
+            "Reviewer call: session=%s:%s_review, dialogue_len=%d, prompt_len=%d",
+            user_id,
+            CareerDialogConfig.CASE_ID,
             len(dialogue_text or ""),
             len(reviewer_prompt or ""),
         )
         
         # Используем отдельную сессию для рецензента (очищаем контекст)
-        reviewer_user_id = int(session_id.split(':')[0]) + 999999  # Отдельный ID для рецензента
+        reviewer_user_id = user_id + REVIEWER_USER_ID_OFFSET
         await clear_case_conversations(CareerDialogConfig.CASE_ID, reviewer_user_id)
 
         response = await send_reviewer_message(
@@ -209,9 +284,9 @@ async def perform_dialogue_review(dialogue_entries: list, session_id: str) -> st
         )
 
         if not response.success:
-            return CareerDialogConfig.ERROR_DIALOGUE_REVIEW.format(
+            return CareerDialogConfig.ERROR_DIALOGUE_REVIEW_FMT(
                 error_type="AI_Error",
-                error_message=response.error or "Не получен ответ от AI",
+                error_message=_html(response.error or "Не получен ответ от AI"),
             )
         
         # Парсим ответ рецензента
@@ -222,9 +297,9 @@ async def perform_dialogue_review(dialogue_entries: list, session_id: str) -> st
         
     except Exception as e:
         logger.error("Error in dialogue review: %s (%s)", e, type(e).__name__)
-        return CareerDialogConfig.ERROR_DIALOGUE_REVIEW.format(
+        return CareerDialogConfig.ERROR_DIALOGUE_REVIEW_FMT(
             error_type=type(e).__name__, 
-            error_message=str(e)
+            error_message=_html(e)
         )
 
 
@@ -233,6 +308,32 @@ class CareerChat(StatesGroup):
     review_complete = State()  # Состояние после завершения рецензирования
 
 
+def _set_active_inline(state: FSMContext, message_id: int | None):
+    """Запоминает id активного инлайн-сообщения (ключ константный — без **-распаковки)."""
+    return state.update_data({ACTIVE_INLINE_MSG_ID_KEY: message_id})
+
+
+async def _answer_joined(message: Message, head: str, tail: str, **kwargs) -> Message:
+    """Отправляет head и tail одним сообщением, а если вместе они не влезают в лимит Telegram — двумя.
+
+    Клавиатура из kwargs прикрепляется к сообщению с tail: длинная рецензия не уносит с собой кнопки.
+    """
+    text = f"{head}\n\n{tail}"
+    if len(text.encode("utf-16-le")) // 2 <= _TELEGRAM_TEXT_LIMIT:
+        return await message.answer(text, **kwargs)
+    reply_markup = kwargs.pop("reply_markup", None)
+    await message.answer(head, **kwargs)
+    return await message.answer(tail, reply_markup=reply_markup, **kwargs)
+
+
+async def _enter_review_complete(state: FSMContext, after_msg_id: int) -> None:
+    """Запоминает инлайн-сообщение после рецензии и переводит FSM в review_complete."""
+    # state и data пишутся в разные колонки fsm_storage — записи независимы
+    await asyncio.gather(
+        _set_active_inline(state, after_msg_id),
+        state.set_state(CareerChat.review_complete),
+    )
+
 
 
 # Запуск по команде (для тестирования)
@@ -249,14 +350,14 @@ async def career_start(message: Message, state: FSMContext) -> None:
     # Инициализируем данные для отслеживания диалога
     await state.update_data(
         turn_count=0,
-        dialogue_entries=[],
-        total_components_achieved=set(),  # Для накопления достигнутых компонентов карьерного диалога
+        dialogue_texts=[],
+        components_bitmap=0,  # Для накопления достигнутых компонентов карьерного диалога
     )
     
     await message.answer(
         CareerDialogConfig.get_start_message(), 
         parse_mode="Markdown", 
-        reply_markup=get_case_controls_reply()
+        reply_markup=_CONTROLS_REPLY_MARKUP
     )
 
 
@@ -271,7 +372,7 @@ async def case_career_dialog_description(callback: CallbackQuery, state: FSMCont
     # Отключаем предыдущее сообщение с инлайн-кнопками, если оно было и это другой message_id
     prev_id = (await state.get_data()).get(ACTIVE_INLINE_MSG_ID_KEY)
     if prev_id and prev_id != callback.message.message_id:
-        await disable_buttons_by_id(callback.bot, callback.message.chat.id, prev_id)
+        _disable_buttons_in_background(callback.bot, callback.message.chat.id, prev_id)
     
     # Показываем описание кейса с кнопками действий
     # Всегда отправляем описание кейса новым сообщением
@@ -281,7 +382,7 @@ async def case_career_dialog_description(callback: CallbackQuery, state: FSMCont
         reply_markup=get_case_description_inline("career_dialog")
     )
     # Фиксируем новое активное сообщение
-    await state.update_data(**{ACTIVE_INLINE_MSG_ID_KEY: msg.message_id})
+    await _set_active_inline(state, msg.message_id)
     await callback.answer()
 
 
@@ -303,19 +404,19 @@ async def case_career_dialog_start_dialog(callback: CallbackQuery, state: FSMCon
     data = await state.get_data()
     prev_id = data.get(ACTIVE_INLINE_MSG_ID_KEY)
     if prev_id:
-        await disable_buttons_by_id(callback.bot, callback.message.chat.id, prev_id)
+        _disable_buttons_in_background(callback.bot, callback.message.chat.id, prev_id)
 
     # КРИТИЧНО: Очищаем контекст AI перед началом нового кейса
     await clear_case_conversations(CareerDialogConfig.CASE_ID, callback.from_user.id)
     
     await state.set_state(CareerChat.waiting_user)
-    await state.update_data(turn_count=0, dialogue_entries=[], total_components_achieved=set(), **{ACTIVE_INLINE_MSG_ID_KEY: None})
+    await state.update_data(turn_count=0, dialogue_texts=[], components_bitmap=0, **{ACTIVE_INLINE_MSG_ID_KEY: None})
     
     # Отправляем стартовое сообщение с поддержкой Markdown
     await callback.message.answer(
         CareerDialogConfig.get_start_message(), 
         parse_mode="Markdown", 
-        reply_markup=get_case_controls_reply()
+        reply_markup=_CONTROLS_REPLY_MARKUP
     )
     # Счетчик старта кейса
     try:
@@ -331,6 +432,24 @@ async def case_career_dialog_start_dialog(callback: CallbackQuery, state: FSMCon
     await callback.answer("Диалог начат")
 
 
+async def _send_theory_pdf(message: Message) -> None:
+    """Отправляет PDF-памятку: по сохранённому file_id, а при его отсутствии — загрузкой файла."""
+    global _PDF_FILE_ID
+    if _PDF_FILE_ID:
+        try:
+            await message.answer_document(_PDF_FILE_ID, caption=_PDF_CAPTION, parse_mode="Markdown")
+            return
+        except TelegramBadRequest as e:
+            # file_id мог устареть — загружаем файл заново
+            logger.warning("Cached PDF file_id rejected, re-uploading: %s", e)
+            _PDF_FILE_ID = None
+
+    sent = await message.answer_document(FSInputFile(_PDF_PATH), caption=_PDF_CAPTION, parse_mode="Markdown")
+    document = getattr(sent, "document", None)
+    if document is not None:
+        _PDF_FILE_ID = document.file_id
+
+
 # Обработчик кнопки "Ознакомиться с теорией" - отправляет PDF сразу
 @router.callback_query(F.data == "case:career_dialog:theory")
 @measure(case=CareerDialogConfig.CASE_ID, step="show_theory")
@@ -343,26 +462,14 @@ async def case_career_dialog_theory(callback: CallbackQuery, state: FSMContext):
     # Отключаем предыдущее активное сообщение с инлайн-кнопками
     prev_id = (await state.get_data()).get(ACTIVE_INLINE_MSG_ID_KEY)
     if prev_id and prev_id != callback.message.message_id:
-        await disable_buttons_by_id(callback.bot, callback.message.chat.id, prev_id)
+        _disable_buttons_in_background(callback.bot, callback.message.chat.id, prev_id)
     
     try:
-        # Путь к PDF-файлу
-        pdf_path = "static/pdfs/karierny_dialog.pdf"
-        
-        # Отправляем документ
-        from aiogram.types import FSInputFile
-        document = FSInputFile(pdf_path)
-        
-        await callback.message.answer_document(
-            document,
-            caption="📚 *Памятка по карьерному диалогу*\n\nИзучи материал и применяй на практике!",
-            parse_mode="Markdown"
-        )
-        
+        await _send_theory_pdf(callback.message)
         await callback.answer("📄 PDF отправлен ✅")
         
     except FileNotFoundError:
-        logger.error("PDF file not found: static/pdfs/karierny_dialog.pdf")
+        logger.error("PDF file not found: %s", _PDF_PATH)
         await callback.answer("❌ Файл не найден. Обратитесь к администратору.", show_alert=True)
     except Exception as e:
         logger.error(f"Error sending PDF: {type(e).__name__}: {e}")
@@ -376,20 +483,16 @@ async def career_stop(message: Message, state: FSMContext) -> None:
     await clear_case_conversations(CareerDialogConfig.CASE_ID, message.from_user.id)
 
     await state.clear()
-    await message.answer(CareerDialogConfig.STOP_MESSAGE, parse_mode="Markdown", reply_markup=ReplyKeyboardRemove())
+    await message.answer(CareerDialogConfig.STOP_MESSAGE, parse_mode="Markdown", reply_markup=_REMOVE_KEYBOARD)
 
 
 async def _process_user_input(user_text: str, message: Message, state: FSMContext, is_admin: bool) -> None:
     """Общий обработчик шага диалога для текстов из чата и из распознавания."""
-    session_id = f"{message.from_user.id}:{CareerDialogConfig.CASE_ID}"
     # Получаем данные состояния
     data = await state.get_data()
     turn_count = data.get("turn_count", 0)
-    dialogue_entries = data.get("dialogue_entries", [])
-    total_components_achieved = data.get("total_components_achieved", set())
-    # Гарантируем, что это множество (а не список из FSM)
-    if isinstance(total_components_achieved, list):
-        total_components_achieved = set(total_components_achieved)
+    dialogue_texts = _dialogue_texts(data)
+    components_bitmap = _components_bitmap(data)
 
     # Формируем структурированный промпт
     user_prompt = CareerDialogConfig.get_user_prompt(user_text)
@@ -428,77 +531,77 @@ async def _process_user_input(user_text: str, message: Message, state: FSMContex
     maxim_reply = parsed_response.get("ReplyText", "")
 
     # Сохраняем ход в диалоге
-    dialogue_entries.append({"role": "Руководитель", "text": user_text})
-    dialogue_entries.append({"role": "Максим", "text": maxim_reply})
+    dialogue_texts.extend((user_text, maxim_reply))
 
     # Обновляем флаги компонентов карьерного диалога
-    career_keys = ["Aspirations", "Strengths", "Development", "Opportunities", "Plan"]
-    for key in career_keys:
-        if parsed_response.get(key, False):
-            total_components_achieved.add(key)
+    for key, bit in _COMPONENT_BITS:
+        if parsed_response.get(key):
+            components_bitmap |= bit
 
     turn_count += 1
 
-    # Обновляем состояние
-    await state.update_data(
-        turn_count=turn_count,
-        dialogue_entries=dialogue_entries,
-        total_components_achieved=total_components_achieved,
-    )
-
     # Форматируем для показа (анализ только для админов)
     formatted_message = format_career_response(parsed_response, show_analysis=is_admin)
 
     # Проверяем условия завершения
-    all_components_achieved = len(total_components_achieved) >= 5 and turn_count >= 2
+    all_components_achieved = components_bitmap == _ALL_COMPONENTS and turn_count >= 2
     max_turns_reached = turn_count >= CareerDialogConfig.MAX_DIALOGUE_TURNS
 
+    # Обновляем состояние параллельно с отправкой ответа — они не зависят друг от друга
+    save_state = state.update_data(
+        turn_count=turn_count,
+        dialogue_texts=dialogue_texts,
+        components_bitmap=components_bitmap,
+    )
+
     if all_components_achieved or max_turns_reached:
-        # Всегда отправляем последний ответ AI перед сообщениями о завершении и анализе
-        await message.answer(formatted_message, parse_mode="Markdown")
-        # Задержка перед следующим сообщением
-        await asyncio.sleep(1)
-        
+        # Последний ответ AI и сообщение о завершении — одним сообщением.
+        # Reply-клавиатура больше не нужна: скрываем её сразу
         completion_msg = (
             CareerDialogConfig.COMPLETION_ALL_COMPONENTS
             if all_components_achieved
             else CareerDialogConfig.get_completion_max_turns_message()
         )
-        await message.answer(completion_msg, parse_mode="Markdown")
-        # Инкременты завершений и возможное авто-приглашение к опросу (одноразово по замку)
-        try:
-            if all_components_achieved:
-                await mark_case_completed(message.from_user.id, CareerDialogConfig.CASE_ID)
-                await mark_case_auto_finished(message.from_user.id, CareerDialogConfig.CASE_ID)
-            else:
-                await mark_case_out_of_moves(message.from_user.id, CareerDialogConfig.CASE_ID)
-                await mark_case_auto_finished(message.from_user.id, CareerDialogConfig.CASE_ID)
-
-        except Exception:
-            pass
+        await asyncio.gather(
+            save_state,
+            _answer_joined(
+                message,
+                formatted_message,
+                completion_msg,
+                parse_mode="Markdown",
+                reply_markup=_REMOVE_KEYBOARD,
+            ),
+        )
+        # Инкременты завершений (независимые запросы в БД — параллельно)
+        finish_stat = mark_case_completed if all_components_achieved else mark_case_out_of_moves
+        _log_failed_stats(await asyncio.gather(
+            finish_stat(message.from_user.id, CareerDialogConfig.CASE_ID),
+            mark_case_auto_finished(message.from_user.id, CareerDialogConfig.CASE_ID),
+            return_exceptions=True,
+        ))
         
         # Показываем индикатор анализа при автоматическом завершении
         async def review_operation():
-            return await perform_dialogue_review(dialogue_entries, session_id)
+            return await perform_dialogue_review(dialogue_texts, message.from_user.id)
         
         review_result = await with_analysis_indicator(
             bot=message.bot,
             chat_id=message.chat.id,
             async_operation=review_operation
         )
-        # Скрываем reply-клавиатуру при завершении
-        await message.answer(review_result, parse_mode="Markdown", reply_markup=ReplyKeyboardRemove())
-        
-        # Задержка перед следующим сообщением
-        await asyncio.sleep(1)
-        
-        # И показываем инлайн-опции после рецензии
-        prev_id = (await state.get_data()).get(ACTIVE_INLINE_MSG_ID_KEY)
+        # Рецензия и инлайн-опции после неё — одним сообщением.
+        # id активного инлайн-сообщения берём из data, прочитанной в начале хода
+        prev_id = data.get(ACTIVE_INLINE_MSG_ID_KEY)
         if prev_id:
-            await disable_buttons_by_id(message.bot, message.chat.id, prev_id)
-        after_msg = await message.answer(CareerDialogConfig.AFTER_REVIEW_MESSAGE, parse_mode="Markdown", reply_markup=get_case_after_review_inline())
-        await state.update_data(**{ACTIVE_INLINE_MSG_ID_KEY: after_msg.message_id})
-        await state.set_state(CareerChat.review_complete)
+            _disable_buttons_in_background(message.bot, message.chat.id, prev_id)
+        after_msg = await _answer_joined(
+            message,
+            review_result,
+            CareerDialogConfig.AFTER_REVIEW_MESSAGE,
+            parse_mode="HTML",
+            reply_markup=_AFTER_REVIEW_GENERIC_MARKUP,
+        )
+        await _enter_review_complete(state, after_msg.message_id)
         
         # В САМОМ КОНЦЕ отправляем приглашение к опросу
         try:
@@ -509,11 +612,11 @@ async def _process_user_input(user_text: str, message: Message, state: FSMContex
     else:
         if CareerDialogConfig.SHOW_PROGRESS_INFO:
             progress_msg = (
-                f"\n\n{CareerDialogConfig.PROGRESS_EMOJI} Ход {turn_count}/{CareerDialogConfig.MAX_DIALOGUE_TURNS} | Компоненты: {len(total_components_achieved)}/5"
+                f"\n\n{CareerDialogConfig.PROGRESS_EMOJI} Ход {turn_count}/{CareerDialogConfig.MAX_DIALOGUE_TURNS} | Компоненты: {components_bitmap.bit_count()}/{len(_COMPONENT_BITS)}"
             )
-            await message.answer(formatted_message + progress_msg, parse_mode="Markdown")
+            await asyncio.gather(save_state, message.answer(formatted_message + progress_msg, parse_mode="Markdown"))
         else:
-            await message.answer(formatted_message, parse_mode="Markdown")
+            await asyncio.gather(save_state, message.answer(formatted_message, parse_mode="Markdown"))
 
 
 @router.message(StateFilter(CareerChat.waiting_user), F.text.len() > 0)
@@ -528,22 +631,21 @@ async def career_turn(message: Message, state: FSMContext, is_admin: bool) -> No
             # эмулируем клик по callback-кнопке
             await clear_case_conversations(CareerDialogConfig.CASE_ID, message.from_user.id)
             await state.set_state(CareerChat.waiting_user)
-            await state.update_data(turn_count=0, dialogue_entries=[], total_components_achieved=set())
+            await state.update_data(turn_count=0, dialogue_texts=[], components_bitmap=0)
             await message.answer(
                 CareerDialogConfig.get_start_message(), 
                 parse_mode="Markdown", 
-                reply_markup=get_case_controls_reply()
+                reply_markup=_CONTROLS_REPLY_MARKUP
             )
             return
         if user_text == KB_BACK_TO_MENU:
             # Возврат в главное меню
             await clear_case_conversations(CareerDialogConfig.CASE_ID, message.from_user.id)
             await state.clear()
-            from app.keyboards.menu import get_main_menu_inline
             await message.answer(
                 "🏠 Главное меню",
                 parse_mode="Markdown",
-                reply_markup=ReplyKeyboardRemove()
+                reply_markup=_REMOVE_KEYBOARD
             )
             await message.answer(
                 "Выберите кейс для тренировки:",
@@ -552,8 +654,7 @@ async def career_turn(message: Message, state: FSMContext, is_admin: bool) -> No
             return
         if user_text == KB_CASE_REVIEW:
             data = await state.get_data()
-            dialogue_entries = data.get("dialogue_entries", [])
-            session_id = f"{message.from_user.id}:{CareerDialogConfig.CASE_ID}"
+            dialogue_texts = _dialogue_texts(data)
             
             # Инкрементируем completed при ручном завершении
             try:
@@ -563,25 +664,25 @@ async def career_turn(message: Message, state: FSMContext, is_admin: bool) -> No
             
             # Показываем индикатор анализа при принудительном запросе
             async def review_operation():
-                return await perform_dialogue_review(dialogue_entries, session_id)
+                return await perform_dialogue_review(dialogue_texts, message.from_user.id)
             
             review_result = await with_analysis_indicator(
                 bot=message.bot,
                 chat_id=message.chat.id,
                 async_operation=review_operation
             )
-            # Скрываем reply-клавиатуру и показываем инлайн-опции
-            await message.answer(review_result, parse_mode="Markdown", reply_markup=ReplyKeyboardRemove())
-            
-            # Задержка перед следующим сообщением
-            await asyncio.sleep(1)
-            
-            prev_id = (await state.get_data()).get(ACTIVE_INLINE_MSG_ID_KEY)
+            # Рецензия и инлайн-опции после неё — одним сообщением
+            prev_id = data.get(ACTIVE_INLINE_MSG_ID_KEY)
             if prev_id:
-                await disable_buttons_by_id(message.bot, message.chat.id, prev_id)
-            after_msg = await message.answer(CareerDialogConfig.AFTER_REVIEW_MESSAGE, parse_mode="Markdown", reply_markup=get_case_after_review_inline())
-            await state.update_data(**{ACTIVE_INLINE_MSG_ID_KEY: after_msg.message_id})
-            await state.set_state(CareerChat.review_complete)
+                _disable_buttons_in_background(message.bot, message.chat.id, prev_id)
+            after_msg = await _answer_joined(
+                message,
+                review_result,
+                CareerDialogConfig.AFTER_REVIEW_MESSAGE,
+                parse_mode="HTML",
+                reply_markup=_AFTER_REVIEW_GENERIC_MARKUP,
+            )
+            await _enter_review_complete(state, after_msg.message_id)
             
             # В САМОМ КОНЦЕ отправляем приглашение к опросу
             try:
@@ -616,9 +717,11 @@ async def career_turn_voice(message: Message, state: FSMContext, is_admin: bool)
                 # Скачиваем файл в память
                 logger.debug(f"Downloading voice file: {message.voice.file_id}")
                 file = await message.bot.get_file(message.voice.file_id)
+                # Свежий буфер на каждое сообщение: после таймаута транскрибации
+                # поток загрузки может ещё читать старый
                 buffer = BytesIO()
                 await message.bot.download(file, buffer)
-                logger.debug(f"File downloaded: {len(buffer.getvalue())} bytes")
+                logger.debug(f"File downloaded: {buffer.tell()} bytes")
                 # Транскрибуем
                 result = await transcribe_voice_ogg(buffer)
                 logger.info(f"Transcription completed: got {len(result)} characters")
@@ -662,7 +765,7 @@ async def career_turn_voice(message: Message, state: FSMContext, is_admin: bool)
 async def career_after_review(message: Message, state: FSMContext) -> None:
     """Handle messages after dialogue review is complete."""
     # Скрываем reply-клавиатуру (покажем пустую) и выводим инлайн-опции
-    await message.answer(CareerDialogConfig.AFTER_REVIEW_MESSAGE, parse_mode="Markdown", reply_markup=get_case_after_review_inline())
+    await message.answer(CareerDialogConfig.AFTER_REVIEW_MESSAGE, parse_mode="HTML", reply_markup=_AFTER_REVIEW_GENERIC_MARKUP)
 
 
 # Управляющие кнопки кейса
@@ -678,8 +781,8 @@ async def case_controls_handler(callback: CallbackQuery, state: FSMContext):
         await state.set_state(CareerChat.waiting_user)
         await state.update_data(
             turn_count=0, 
-            dialogue_entries=[], 
-            total_components_achieved=set(),
+            dialogue_texts=[],
+            components_bitmap=0,
             **{ACTIVE_INLINE_MSG_ID_KEY: None}
         )
         
@@ -692,59 +795,74 @@ async def case_controls_handler(callback: CallbackQuery, state: FSMContext):
             await callback.message.answer(
                 CareerDialogConfig.get_start_message(), 
                 parse_mode="Markdown", 
-                reply_markup=get_case_controls_inline_by_case(CareerDialogConfig.CASE_ID)
+                reply_markup=_CONTROLS_MARKUP
             )
         await callback.answer("Диалог принудительно перезапущен")
     
     elif callback.data.endswith("review"):
         # === КНОПКА REVIEW ===
-        current_state = await state.get_state()
-        if current_state != CareerChat.waiting_user:
-            await callback.answer("Анализ доступен только во время активного диалога.")
-            return
+        # Двойной клик: второй обработчик ждёт замка и видит уже review_complete
+        # Ключ — пользователь: callback.message может быть недоступно
+        lock_key = callback.from_user.id
+        lock = _REVIEW_LOCKS.setdefault(lock_key, asyncio.Lock())
+        _REVIEW_LOCK_USERS[lock_key] = _REVIEW_LOCK_USERS.get(lock_key, 0) + 1
+        try:
+            async with lock:
+                current_state = await state.get_state()
+                if current_state != CareerChat.waiting_user:
+                    await callback.answer("Анализ доступен только во время активного диалога.")
+                    return
+
+                # Подтверждаем нажатие сразу: ответ уходит параллельно рецензии и отправкам
+                ack_task = asyncio.create_task(_ack_callback(callback))
         
-        # Принудительный запуск рецензента по текущему диалогу
-        data = await state.get_data()
-        dialogue_entries = data.get("dialogue_entries", [])
-        session_id = f"{callback.from_user.id}:{CareerDialogConfig.CASE_ID}"
+                # Принудительный запуск рецензента по текущему диалогу
+                data = await state.get_data()
+                dialogue_texts = _dialogue_texts(data)
         
-        # Инкрементируем completed при ручном завершении и отправляем приглашение к опросу
-        try:
-            await mark_case_completed(callback.from_user.id, CareerDialogConfig.CASE_ID)
-            if await acquire_rating_invite_lock(callback.from_user.id):
-                await send_survey_invitation(callback.bot, callback.message.chat.id, callback.from_user.id)
-        except Exception:
-            pass
+                # Инкрементируем completed при ручном завершении и берём замок приглашения к опросу
+                # параллельно; приглашение отправляется только после получения замка
+                completed, invite_lock = await asyncio.gather(
+                    mark_case_completed(callback.from_user.id, CareerDialogConfig.CASE_ID),
+                    acquire_rating_invite_lock(callback.from_user.id),
+                    return_exceptions=True,
+                )
+                _log_failed_stats((completed, invite_lock))
+                if invite_lock and not isinstance(invite_lock, Exception):
+                    try:
+                        await send_survey_invitation(callback.bot, callback.message.chat.id, callback.from_user.id)
+                    except Exception:
+                        pass
         
-        # Показываем индикатор анализа при принудительном запросе через callback
-        async def review_operation():
-            return await perform_dialogue_review(dialogue_entries, session_id)
+                # Показываем индикатор анализа при принудительном запросе через callback
+                async def review_operation():
+                    return await perform_dialogue_review(dialogue_texts, callback.from_user.id)
         
-        review_result = await with_analysis_indicator(
-            bot=callback.bot,
-            chat_id=callback.message.chat.id,
-            async_operation=review_operation
-        )
-        if callback.message:
-            # Отключаем кнопки в предыдущем инлайн-сообщении
-            data = await state.get_data()
-            prev_id = data.get(ACTIVE_INLINE_MSG_ID_KEY)
-            if prev_id:
-                await disable_buttons_by_id(callback.bot, callback.message.chat.id, prev_id)
-            # Скрываем reply и показываем инлайн-опции
-            await callback.message.answer(review_result, parse_mode="Markdown", reply_markup=ReplyKeyboardRemove())
-            
-            # Задержка перед следующим сообщением
-            await asyncio.sleep(1)
-            
-            # Показываем кнопки после рецензии
-            prev_id = (await state.get_data()).get(ACTIVE_INLINE_MSG_ID_KEY)
-            if prev_id:
-                await disable_buttons_by_id(callback.bot, callback.message.chat.id, prev_id)
-            after_msg = await callback.message.answer(
-                CareerDialogConfig.AFTER_REVIEW_MESSAGE, 
-                parse_mode="Markdown", 
-                reply_markup=get_case_after_review_inline_by_case(CareerDialogConfig.CASE_ID)
-            )
-            await state.update_data(**{ACTIVE_INLINE_MSG_ID_KEY: after_msg.message_id})
-            await state.set_state(CareerChat.review_complete)
\ No newline at end of file
+                review_result = await with_analysis_indicator(
+                    bot=callback.bot,
+                    chat_id=callback.message.chat.id,
+                    async_operation=review_operation
+                )
+                if callback.message:
+                    # Отключаем кнопки в предыдущем инлайн-сообщении (data уже прочитана выше)
+                    prev_id = data.get(ACTIVE_INLINE_MSG_ID_KEY)
+                    if prev_id:
+                        _disable_buttons_in_background(callback.bot, callback.message.chat.id, prev_id)
+                    # Рецензия и кнопки после неё — одним сообщением, если влезают в лимит Telegram
+                    after_msg = await _answer_joined(
+                        callback.message,
+                        review_result,
+                        CareerDialogConfig.AFTER_REVIEW_MESSAGE,
+                        parse_mode="HTML",
+                        reply_markup=_AFTER_REVIEW_MARKUP,
+                    )
+                    await _enter_review_complete(state, after_msg.message_id)
+                await ack_task
+        finally:
+            # locked() ложно, пока ожидающее нажатие ещё не проснулось, поэтому считаем нажатия явно
+            remaining = _REVIEW_LOCK_USERS[lock_key] - 1
+            if remaining:
+                _REVIEW_LOCK_USERS[lock_key] = remaining
+            else:
+                del _REVIEW_LOCK_USERS[lock_key]
+                _REVIEW_LOCKS.pop(lock_key, None)
\ No newline at end of file
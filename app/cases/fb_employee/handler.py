@@ -7,12 +7,21 @@
 import json
 import logging
 import asyncio
+import time
+from functools import wraps
 from io import BytesIO
 from aiogram import Router, F
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
+from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove, FSInputFile
+
+try:
+    # C-парсер: ответ ИИ разбирается на каждом ходе диалога
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 from app.services.transcription_service import transcribe_voice_ogg
 from app.services.validation_service import validator, ValidationError
@@ -45,9 +54,11 @@ from app.keyboards.menu import (
     get_case_after_review_inline_by_case,
     get_case_controls_inline_by_case,
     get_case_description_inline,
+    get_main_menu_inline,
     disable_previous_buttons,
     disable_buttons_by_id,
 )
+from app.storage import PostgresFSMStorage
 from app.texts import Texts
 from .config import AIDemoConfig
 
@@ -55,23 +66,135 @@ logger = logging.getLogger(__name__)
 router = Router(name="case_fb_employee")
 # Ключ для хранения id последнего сообщения с инлайн-кнопками в FSM
 ACTIVE_INLINE_MSG_ID_KEY = "active_inline_message_id"
+_JSON_DECODER = json.JSONDecoder()
+# Достигнутые компоненты ПРОВД храним в FSM битовой маской (provd_bitmap)
+_PROVD_BITS = tuple((key, 1 << i) for i, key in enumerate(AIDemoConfig.PROVD_LABELS))
+_ALL_PROVD = (1 << len(_PROVD_BITS)) - 1
+# Таблица для строк анализа: (ключ, лейбл) и статус по bool-индексу
+_PROVD_LABELS_TUPLE = tuple(AIDemoConfig.PROVD_LABELS.items())
+_STATUS = ("❌", "✅")
+# Рецензент работает в отдельной сессии: user_id пользователя + смещение
+REVIEWER_USER_ID_OFFSET = 999_999
+# Клавиатуры кейса не зависят от пользователя — собираем их один раз при импорте
+_CONTROLS_MARKUP = get_case_controls_inline_by_case(AIDemoConfig.CASE_ID)
+_AFTER_REVIEW_MARKUP = get_case_after_review_inline_by_case(AIDemoConfig.CASE_ID)
+_AFTER_REVIEW_GENERIC_MARKUP = get_case_after_review_inline()
+_CONTROLS_REPLY_MARKUP = get_case_controls_reply()
+_REMOVE_KEYBOARD = ReplyKeyboardRemove()
+
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
+# Сессии рецензента, очищенные после прошлой рецензии в этом процессе: перед новой рецензией
+# их не нужно чистить повторно. После рестарта множество пусто — первая рецензия чистит сессию сама
+_CLEAN_REVIEWER_SESSIONS: set[int] = set()
+_CLEAN_REVIEWER_SESSIONS_MAX = 10_000
+# Ответы рецензента длиннее этого порога разбираются в отдельном потоке, не блокируя event loop
+_REVIEW_PARSE_IN_THREAD_LEN = 16_384
+# Замки по chat_id: ходы одного чата обрабатываются по очереди, разные чаты — параллельно
+_TURN_LOCKS: dict[int, asyncio.Lock] = {}
+# Сколько ходов чата держат или ждут замок; замок удаляется, только когда их не осталось
+_TURN_LOCK_USERS: dict[int, int] = {}
+# Пауза перед инлайн-опциями после рецензии по кнопке: пользователь успевает прочитать рецензию
+_AFTER_REVIEW_DELAY_SEC = 1.0
+# Предел длины текста одного сообщения Telegram (в UTF-16 единицах)
+_TELEGRAM_TEXT_LIMIT = 4096
+
+# PDF-памятка: после первой загрузки переотправляется по file_id Telegram, без чтения файла
+_PDF_PATH = "static/pdfs/razgovor_s_podchinennym.pdf"
+_PDF_CAPTION = "📚 *Памятка по обратной связи сотруднику*\n\nИзучи материал и применяй на практике!"
+_PDF_FILE_ID: str | None = None
+
+
+def _load_json_object(response_text: str) -> dict | None:
+    """Разбирает JSON-ответ ИИ: сначала целиком, иначе первый объект начиная с '{'."""
+    try:
+        # Обычно модель возвращает чистый JSON — разбираем без поиска и копирования
+        parsed = json_loads(response_text)
+    except ValueError:
+        start_idx = response_text.find('{')
+        if start_idx == -1:
+            return None
+        # raw_decode (stdlib) сам находит конец объекта, текст после него игнорируется
+        parsed, _ = _JSON_DECODER.raw_decode(response_text, start_idx)
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _provd_bitmap(data: dict) -> int:
+    """Битовая маска достигнутых ПРОВД; для старых диалогов — из набора total_provd_achieved."""
+    bitmap = data.get("provd_bitmap")
+    if bitmap is not None:
+        return bitmap
+    achieved = data.get("total_provd_achieved") or ()
+    return sum(bit for key, bit in _PROVD_BITS if key in achieved)
+
+
+def _serialize_by_chat(handler):
+    """Выполняет ходы диалога одного чата последовательно.
+
+    Два быстрых сообщения подряд иначе читают одни и те же данные FSM,
+    и один из ходов теряется при записи.
+    """
+    @wraps(handler)
+    async def wrapper(message: Message, *args, **kwargs):
+        chat_id = message.chat.id
+        lock = _TURN_LOCKS.setdefault(chat_id, asyncio.Lock())
+        _TURN_LOCK_USERS[chat_id] = _TURN_LOCK_USERS.get(chat_id, 0) + 1
+        try:
+            async with lock:
+                return await handler(message, *args, **kwargs)
+        finally:
+            # locked() ложно, пока ожидающий ход ещё не проснулся, поэтому считаем ходы явно
+            remaining = _TURN_LOCK_USERS[chat_id] - 1
+            if remaining:
+                _TURN_LOCK_USERS[chat_id] = remaining
+            else:
+                del _TURN_LOCK_USERS[chat_id]
+                _TURN_LOCKS.pop(chat_id, None)
+
+    return wrapper
+
+
+async def _reset_reviewer_session(reviewer_user_id: int) -> None:
+    """Очищает сессию рецензента после рецензии и помечает её чистой."""
+    try:
+        await clear_case_conversations(AIDemoConfig.CASE_ID, reviewer_user_id)
+    except Exception as e:
+        logger.warning("Failed to clear reviewer session %s: %s", reviewer_user_id, e)
+        return
+    if len(_CLEAN_REVIEWER_SESSIONS) >= _CLEAN_REVIEWER_SESSIONS_MAX:
+        # Ограничиваем память: забытые сессии просто очистятся перед следующей рецензией
+        _CLEAN_REVIEWER_SESSIONS.clear()
+    _CLEAN_REVIEWER_SESSIONS.add(reviewer_user_id)
+
+
+def _reset_reviewer_session_in_background(reviewer_user_id: int) -> None:
+    """Очищает сессию рецензента фоновой задачей, не задерживая ответ пользователю."""
+    task = asyncio.create_task(_reset_reviewer_session(reviewer_user_id))
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
+async def _record_stat(stat_coro) -> None:
+    """Ждёт запись статистики кейса; ошибка только логируется."""
+    try:
+        await stat_coro
+    except Exception as e:
+        logger.warning("Failed to update case stats: %s", e)
+
+
+def _record_stat_in_background(stat_coro) -> None:
+    """Пишет статистику кейса фоновой задачей, не задерживая ответ пользователю."""
+    task = asyncio.create_task(_record_stat(stat_coro))
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
 
 
 def parse_ai_response(response_text: str) -> dict:
     """Парсит JSON ответ от ИИ с fallback на обычный текст."""
     try:
-        # Пытаемся найти JSON в ответе
-        start_idx = response_text.find('{')
-        end_idx = response_text.rfind('}') + 1
-        
-        if start_idx != -1 and end_idx > start_idx:
-            json_str = response_text[start_idx:end_idx]
-            parsed = json.loads(json_str)
-            
-            # Проверяем обязательные поля
-            if "ReplyText" in parsed:
-                return parsed
-                
+        parsed = _load_json_object(response_text)
+        # Проверяем обязательные поля
+        if parsed and "ReplyText" in parsed:
+            return parsed
     except (json.JSONDecodeError, ValueError) as e:
         logger.warning("Failed to parse AI JSON response: %s", e)
     
@@ -94,13 +217,10 @@ def format_provd_response(parsed_response: dict, show_analysis: bool = False) ->
         return f"{AIDemoConfig.EVGENY_EMOJI} *Евгений:* {reply_text}"
     
     # Для админов показываем анализ ПРОВД
-    analysis_parts = []
-    
-    for key, label in AIDemoConfig.PROVD_LABELS.items():
-        status = "✅" if parsed_response.get(key, False) else "❌"
-        analysis_parts.append(f"{status} {label}")
-    
-    analysis = "\n".join(analysis_parts)
+    analysis = "\n".join(
+        f"{_STATUS[bool(parsed_response.get(key, False))]} {label}"
+        for key, label in _PROVD_LABELS_TUPLE
+    )
     
     return f"""{AIDemoConfig.EVGENY_EMOJI} *Евгений:* {reply_text}
 
@@ -111,18 +231,10 @@ def format_provd_response(parsed_response: dict, show_analysis: bool = False) ->
 def parse_reviewer_response(response_text: str) -> dict:
     """Парсит JSON ответ от рецензента с fallback."""
     try:
-        # Пытаемся найти JSON в ответе
-        start_idx = response_text.find('{')
-        end_idx = response_text.rfind('}') + 1
-        
-        if start_idx != -1 and end_idx > start_idx:
-            json_str = response_text[start_idx:end_idx]
-            parsed = json.loads(json_str)
-            
-            # Проверяем обязательные поля
-            if "overall" in parsed:
-                return parsed
-                
+        parsed = _load_json_object(response_text)
+        # Проверяем обязательные поля
+        if parsed and "overall" in parsed:
+            return parsed
     except (json.JSONDecodeError, ValueError) as e:
         logger.warning("Failed to parse reviewer JSON response: %s", e)
     
@@ -134,6 +246,13 @@ def parse_reviewer_response(response_text: str) -> dict:
     }
 
 
+async def parse_reviewer_response_async(response_text: str) -> dict:
+    """parse_reviewer_response, который разбирает большие ответы в отдельном потоке."""
+    if len(response_text) > _REVIEW_PARSE_IN_THREAD_LEN:
+        return await asyncio.to_thread(parse_reviewer_response, response_text)
+    return parse_reviewer_response(response_text)
+
+
 def format_review_response(parsed_review: dict) -> str:
     """Форматирует финальный отзыв рецензента для пользователя."""
     overall = parsed_review.get("overall", "")
@@ -165,16 +284,14 @@ def format_review_response(parsed_review: dict) -> str:
 
 def extract_dialogue_text(dialogue_entries: list) -> str:
     """Извлекает только диалог для рецензента (без ПРОВД анализа)."""
-    dialogue_lines = []
-    for entry in dialogue_entries:
-        role = entry.get("role", "")
-        text = entry.get("text", "")
-        if role and text:
-            dialogue_lines.append(f"{role}: {text}")
-    return "\n\n".join(dialogue_lines)
+    return "\n\n".join(
+        f"{entry['role']}: {entry['text']}"
+        for entry in dialogue_entries
+        if entry.get("role") and entry.get("text")
+    )
 
 
-async def perform_dialogue_review(dialogue_entries: list, session_id: str) -> str:
+async def perform_dialogue_review(dialogue_entries: list, user_id: int) -> str:
     """Вызывает рецензента для анализа завершенного диалога."""
     
     try:
@@ -189,22 +306,31 @@ async def perform_dialogue_review(dialogue_entries: list, session_id: str) -> st
         
         # Отправляем на новую сессию рецензента
         logger.info(
-            "Reviewer call: session=%s_review, dialogue_len=%d, prompt_len=%d",
-            session_id,
+            "Reviewer call: session=%s:%s_review, dialogue_len=%d, prompt_len=%d",
+            user_id,
+            AIDemoConfig.CASE_ID,
             len(dialogue_text or ""),
             len(reviewer_prompt or ""),
         )
         
         # Используем отдельную сессию для рецензента (очищаем контекст)
-        reviewer_user_id = int(session_id.split(':')[0]) + 999999  # Отдельный ID для рецензента
-        await clear_case_conversations(AIDemoConfig.CASE_ID, reviewer_user_id)
+        reviewer_user_id = user_id + REVIEWER_USER_ID_OFFSET
+        if reviewer_user_id in _CLEAN_REVIEWER_SESSIONS:
+            # Сессию уже очистили после прошлой рецензии — лишний запрос не нужен
+            _CLEAN_REVIEWER_SESSIONS.discard(reviewer_user_id)
+        else:
+            await clear_case_conversations(AIDemoConfig.CASE_ID, reviewer_user_id)
         
-        response = await send_reviewer_message(
-            case_id=AIDemoConfig.CASE_ID,
-            user_id=reviewer_user_id,
-            message=reviewer_prompt,
-            system_prompt=AIDemoConfig.REVIEWER_SYSTEM_PROMPT,
-        )
+        try:
+            response = await send_reviewer_message(
+                case_id=AIDemoConfig.CASE_ID,
+                user_id=reviewer_user_id,
+                message=reviewer_prompt,
+                system_prompt=AIDemoConfig.REVIEWER_SYSTEM_PROMPT,
+            )
+        finally:
+            # Готовим сессию к следующей рецензии вне критического пути
+            _reset_reviewer_session_in_background(reviewer_user_id)
         
         if not response.success:
             return AIDemoConfig.ERROR_DIALOGUE_REVIEW.format(
@@ -213,7 +339,7 @@ async def perform_dialogue_review(dialogue_entries: list, session_id: str) -> st
             )
         
         # Парсим ответ рецензента
-        parsed_review = parse_reviewer_response(response.content)
+        parsed_review = await parse_reviewer_response_async(response.content)
         
         # Форматируем финальный ответ
         return format_review_response(parsed_review)
@@ -231,6 +357,124 @@ class AIChat(StatesGroup):
     review_complete = State()  # Состояние после завершения рецензирования
 
 
+def _set_active_inline(state: FSMContext, message_id: int | None):
+    """Запоминает id активного инлайн-сообщения (ключ константный — без **-распаковки)."""
+    return state.update_data({ACTIVE_INLINE_MSG_ID_KEY: message_id})
+
+
+async def _answer_joined(message: Message, head: str, tail: str, **kwargs) -> Message:
+    """Отправляет head и tail одним сообщением, а если это не удаётся — двумя.
+
+    head — текст модели: он может не влезть в лимит Telegram вместе с tail или
+    содержать непарные * и _. Тогда head уходит отдельно (при ошибке разметки —
+    без parse_mode), а tail со статичным текстом несёт клавиатуру, и кнопки не теряются.
+    """
+    text = f"{head}\n\n{tail}"
+    if len(text.encode("utf-16-le")) // 2 <= _TELEGRAM_TEXT_LIMIT:
+        try:
+            return await message.answer(text, **kwargs)
+        except TelegramBadRequest as e:
+            logger.warning("Joined message rejected, sending parts separately: %s", e)
+    reply_markup = kwargs.pop("reply_markup", None)
+    parse_mode = kwargs.pop("parse_mode", None)
+    for head_parse_mode in (parse_mode, None):
+        try:
+            await message.answer(head, parse_mode=head_parse_mode, **kwargs)
+            break
+        except TelegramBadRequest as e:
+            logger.warning("Message part rejected (parse_mode=%s): %s", head_parse_mode, e)
+    return await message.answer(tail, parse_mode=parse_mode, reply_markup=reply_markup, **kwargs)
+
+
+async def _enter_review_complete(state: FSMContext, after_msg_id: int) -> None:
+    """Запоминает инлайн-сообщение после рецензии и переводит FSM в review_complete."""
+    # state и data пишутся в разные колонки fsm_storage — записи независимы
+    await asyncio.gather(
+        _set_active_inline(state, after_msg_id),
+        state.set_state(AIChat.review_complete),
+    )
+
+
+async def _send_after_review_followup(
+    message: Message,
+    state: FSMContext,
+    review_sent_at: float,
+    expected_inline_id: int | None,
+) -> None:
+    """Через паузу показывает инлайн-опции после рецензии и запоминает это сообщение.
+
+    Если за паузу диалог перезапустили, опции не отправляются: иначе устаревшие
+    кнопки попали бы в новый диалог и перезаписали его активное сообщение.
+    """
+    try:
+        # Пауза отсчитывается от начала отправки рецензии: время её доставки уже входит в паузу
+        remaining = review_sent_at + _AFTER_REVIEW_DELAY_SEC - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        current_state, data = await asyncio.gather(state.get_state(), state.get_data())
+        if current_state != AIChat.review_complete or data.get(ACTIVE_INLINE_MSG_ID_KEY) != expected_inline_id:
+            return
+        # Кнопки предыдущего инлайн-сообщения уже отключены обработчиком — повторная правка не нужна
+        after_msg = await message.answer(
+            AIDemoConfig.AFTER_REVIEW_MESSAGE, 
+            parse_mode="Markdown", 
+            reply_markup=_AFTER_REVIEW_MARKUP
+        )
+        await _set_active_inline(state, after_msg.message_id)
+    except Exception:
+        logger.exception("Failed to send after-review options for chat %s", message.chat.id)
+
+
+def _schedule_after_review_followup(
+    message: Message,
+    state: FSMContext,
+    review_sent_at: float,
+    expected_inline_id: int | None,
+) -> None:
+    """Планирует показ инлайн-опций после рецензии, не удерживая обработчик на время паузы."""
+    task = asyncio.create_task(_send_after_review_followup(message, state, review_sent_at, expected_inline_id))
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
+def _log_failed_stats(results) -> None:
+    """Логирует ошибки из результатов asyncio.gather(..., return_exceptions=True)."""
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("Failed to update case stats: %s", result)
+
+
+async def _record_auto_finish_stats(user_id: int, all_provd_achieved: bool) -> bool:
+    """
+    Записывает статистику автоматического завершения кейса.
+    Возвращает True, если после диалога можно пригласить пользователя в опрос.
+    """
+    # Приглашение — только при первом успешном завершении (проверка ДО инкремента)
+    allow_invite = False
+    if all_provd_achieved:
+        try:
+            allow_invite = not await has_any_completed(user_id)
+        except Exception:
+            allow_invite = False
+
+    # Инкременты завершений (независимые запросы в БД — параллельно)
+    finish_stat = mark_case_completed if all_provd_achieved else mark_case_out_of_moves
+    _log_failed_stats(await asyncio.gather(
+        finish_stat(user_id, AIDemoConfig.CASE_ID),
+        mark_case_auto_finished(user_id, AIDemoConfig.CASE_ID),
+        return_exceptions=True,
+    ))
+    return allow_invite
+
+
+async def _save_turn(state: FSMContext, dialogue_entries: list, turn_entries: list, **data) -> None:
+    """Сохраняет ход диалога: в Postgres дописывает только новые реплики, иначе всю историю."""
+    if isinstance(state.storage, PostgresFSMStorage):
+        await state.storage.append_data(state.key, "dialogue_entries", turn_entries, data)
+    else:
+        await state.update_data(dialogue_entries=dialogue_entries, **data)
+
+
 
 
 # Запуск по команде (сохраняем как в демо)
@@ -248,13 +492,13 @@ async def ai_demo_start(message: Message, state: FSMContext) -> None:
     await state.update_data(
         turn_count=0,
         dialogue_entries=[],
-        total_provd_achieved=set(),  # Для накопления достигнутых ПРОВД компонентов
+        provd_bitmap=0,  # Для накопления достигнутых ПРОВД компонентов
     )
     
     await message.answer(
         AIDemoConfig.get_start_message(), 
         parse_mode="Markdown", 
-        reply_markup=get_case_controls_reply()
+        reply_markup=_CONTROLS_REPLY_MARKUP
     )
     
     # Отправляем дополнительное сообщение про аудиозапись
@@ -284,7 +528,7 @@ async def case_fb_employee_description(callback: CallbackQuery, state: FSMContex
         reply_markup=get_case_description_inline("fb_employee")
     )
     # Фиксируем новое активное сообщение с инлайн-кнопками
-    await state.update_data(**{ACTIVE_INLINE_MSG_ID_KEY: msg.message_id})
+    await _set_active_inline(state, msg.message_id)
     await callback.answer()
 
 
@@ -311,20 +555,25 @@ async def case_fb_employee_start_dialog(callback: CallbackQuery, state: FSMConte
     # КРИТИЧНО: Очищаем контекст AI перед началом нового кейса
     await clear_case_conversations(AIDemoConfig.CASE_ID, callback.from_user.id)
     
-    await state.set_state(AIChat.waiting_user)
-    await state.update_data(turn_count=0, dialogue_entries=[], total_provd_achieved=set(), **{ACTIVE_INLINE_MSG_ID_KEY: None})
+    # Состояние и данные — независимые записи в хранилище, одно сообщение данных вместо нескольких
+    await asyncio.gather(
+        state.set_state(AIChat.waiting_user),
+        state.update_data({
+            "turn_count": 0,
+            "dialogue_entries": [],
+            "provd_bitmap": 0,
+            ACTIVE_INLINE_MSG_ID_KEY: None,
+        }),
+    )
     
     # Отправляем стартовое сообщение с поддержкой Markdown
     await callback.message.answer(
         AIDemoConfig.get_start_message(), 
         parse_mode="Markdown", 
-        reply_markup=get_case_controls_reply()
+        reply_markup=_CONTROLS_REPLY_MARKUP
     )
     # Счетчик старта кейса
-    try:
-        await mark_case_started(callback.from_user.id, AIDemoConfig.CASE_ID)
-    except Exception:
-        pass
+    _record_stat_in_background(mark_case_started(callback.from_user.id, AIDemoConfig.CASE_ID))
     
     # Отправляем дополнительное сообщение про аудиозапись
     await callback.message.answer(
@@ -334,6 +583,24 @@ async def case_fb_employee_start_dialog(callback: CallbackQuery, state: FSMConte
     await callback.answer("Диалог начат")
 
 
+async def _send_theory_pdf(message: Message) -> None:
+    """Отправляет PDF-памятку: по сохранённому file_id, а при его отсутствии — загрузкой файла."""
+    global _PDF_FILE_ID
+    if _PDF_FILE_ID:
+        try:
+            await message.answer_document(_PDF_FILE_ID, caption=_PDF_CAPTION, parse_mode="Markdown")
+            return
+        except TelegramBadRequest as e:
+            # file_id мог устареть — загружаем файл заново
+            logger.warning("Cached PDF file_id rejected, re-uploading: %s", e)
+            _PDF_FILE_ID = None
+
+    sent = await message.answer_document(FSInputFile(_PDF_PATH), caption=_PDF_CAPTION, parse_mode="Markdown")
+    document = getattr(sent, "document", None)
+    if document is not None:
+        _PDF_FILE_ID = document.file_id
+
+
 # Обработчик кнопки "Ознакомиться с теорией" - отправляет PDF сразу
 @router.callback_query(F.data == "case:fb_employee:theory")
 @measure(case=AIDemoConfig.CASE_ID, step="show_theory")
@@ -349,23 +616,11 @@ async def case_fb_employee_theory(callback: CallbackQuery, state: FSMContext):
         await disable_buttons_by_id(callback.bot, callback.message.chat.id, prev_id)
     
     try:
-        # Путь к PDF-файлу
-        pdf_path = "static/pdfs/razgovor_s_podchinennym.pdf"
-        
-        # Отправляем документ
-        from aiogram.types import FSInputFile
-        document = FSInputFile(pdf_path)
-        
-        await callback.message.answer_document(
-            document,
-            caption="📚 *Памятка по обратной связи сотруднику*\n\nИзучи материал и применяй на практике!",
-            parse_mode="Markdown"
-        )
-        
+        await _send_theory_pdf(callback.message)
         await callback.answer("📄 PDF отправлен ✅")
         
     except FileNotFoundError:
-        logger.error("PDF file not found: static/pdfs/razgovor_s_podchinennym.pdf")
+        logger.error("PDF file not found: %s", _PDF_PATH)
         await callback.answer("❌ Файл не найден. Обратитесь к администратору.", show_alert=True)
     except Exception as e:
         logger.error(f"Error sending PDF: {type(e).__name__}: {e}")
@@ -379,20 +634,16 @@ async def ai_demo_stop(message: Message, state: FSMContext) -> None:
     await clear_case_conversations(AIDemoConfig.CASE_ID, message.from_user.id)
 
     await state.clear()
-    await message.answer(AIDemoConfig.STOP_MESSAGE, parse_mode="Markdown", reply_markup=ReplyKeyboardRemove())
+    await message.answer(AIDemoConfig.STOP_MESSAGE, parse_mode="Markdown", reply_markup=_REMOVE_KEYBOARD)
 
 
 async def _process_user_input(user_text: str, message: Message, state: FSMContext, is_admin: bool) -> None:
     """Общий обработчик шага диалога для текстов из чата и из распознавания."""
-    session_id = f"{message.from_user.id}:{AIDemoConfig.CASE_ID}"
     # Получаем данные состояния
     data = await state.get_data()
     turn_count = data.get("turn_count", 0)
     dialogue_entries = data.get("dialogue_entries", [])
-    total_provd_achieved = data.get("total_provd_achieved", set())
-    # Гарантируем, что это множество (а не список из FSM)
-    if isinstance(total_provd_achieved, list):
-        total_provd_achieved = set(total_provd_achieved)
+    provd_bitmap = _provd_bitmap(data)
 
     # Формируем структурированный промпт
     user_prompt = AIDemoConfig.get_user_prompt(user_text)
@@ -431,84 +682,79 @@ async def _process_user_input(user_text: str, message: Message, state: FSMContex
     evgeny_reply = parsed_response.get("ReplyText", "")
 
     # Сохраняем ход в диалоге
-    dialogue_entries.append({"role": "Руководитель", "text": user_text})
-    dialogue_entries.append({"role": "Евгений", "text": evgeny_reply})
+    turn_entries = [
+        {"role": "Руководитель", "text": user_text},
+        {"role": "Евгений", "text": evgeny_reply},
+    ]
+    dialogue_entries.extend(turn_entries)
 
     # Обновляем ПРОВД флаги
-    provd_keys = ["Behavior", "Result", "Emotion", "Question", "Agreement"]
-    for key in provd_keys:
-        if parsed_response.get(key, False):
-            total_provd_achieved.add(key)
+    for key, bit in _PROVD_BITS:
+        if parsed_response.get(key):
+            provd_bitmap |= bit
 
     turn_count += 1
 
-    # Обновляем состояние
-    await state.update_data(
+    # Обновляем состояние (история диалога дописывается, а не перезаписывается)
+    await _save_turn(
+        state,
+        dialogue_entries,
+        turn_entries,
         turn_count=turn_count,
-        dialogue_entries=dialogue_entries,
-        total_provd_achieved=total_provd_achieved,
+        provd_bitmap=provd_bitmap,
     )
 
     # Форматируем для показа (анализ только для админов)
     formatted_message = format_provd_response(parsed_response, show_analysis=is_admin)
 
     # Проверяем условия завершения
-    all_provd_achieved = len(total_provd_achieved) >= 5 and turn_count >= 2
+    all_provd_achieved = provd_bitmap == _ALL_PROVD and turn_count >= 2
     max_turns_reached = turn_count >= AIDemoConfig.MAX_DIALOGUE_TURNS
 
     if all_provd_achieved or max_turns_reached:
-        # Всегда отправляем последний ответ AI перед сообщениями о завершении и анализе
-        await message.answer(formatted_message, parse_mode="Markdown")
-        # Задержка перед следующим сообщением
-        await asyncio.sleep(1)
-        
+        # Статистика завершения пишется в БД параллельно с рецензией — они не зависят друг от друга
+        stats_task = asyncio.create_task(
+            _record_auto_finish_stats(message.from_user.id, all_provd_achieved)
+        )
+        # Последний ответ AI и сообщение о завершении — одним сообщением (без паузы между ними).
+        # Reply-клавиатура больше не нужна: скрываем её сразу
         completion_msg = (
             AIDemoConfig.COMPLETION_ALL_PROVD
             if all_provd_achieved
             else AIDemoConfig.get_completion_max_turns_message()
         )
-        await message.answer(completion_msg, parse_mode="Markdown")
-        # Инкременты завершений
-        try:
-            # Отправим приглашение только при первом успешном завершении (проверка ДО инкремента)
-            allow_invite = False
-            if all_provd_achieved:
-                try:
-                    allow_invite = not await has_any_completed(message.from_user.id)
-                except Exception:
-                    allow_invite = False
-
-            if all_provd_achieved:
-                await mark_case_completed(message.from_user.id, AIDemoConfig.CASE_ID)
-                await mark_case_auto_finished(message.from_user.id, AIDemoConfig.CASE_ID)
-            else:
-                await mark_case_out_of_moves(message.from_user.id, AIDemoConfig.CASE_ID)
-                await mark_case_auto_finished(message.from_user.id, AIDemoConfig.CASE_ID)
-        except Exception:
-            pass
-        
+        await _answer_joined(
+            message,
+            formatted_message,
+            completion_msg,
+            parse_mode="Markdown",
+            reply_markup=_REMOVE_KEYBOARD,
+        )
         # Показываем индикатор анализа при автоматическом завершении
         async def review_operation():
-            return await perform_dialogue_review(dialogue_entries, session_id)
+            return await perform_dialogue_review(dialogue_entries, message.from_user.id)
         
-        review_result = await with_analysis_indicator(
-            bot=message.bot,
-            chat_id=message.chat.id,
-            async_operation=review_operation
-        )
-        # Скрываем reply-клавиатуру при завершении
-        await message.answer(review_result, parse_mode="Markdown", reply_markup=ReplyKeyboardRemove())
-        
-        # Задержка перед следующим сообщением
-        await asyncio.sleep(1)
-        
-        # И показываем инлайн-опции после рецензии
-        prev_id = (await state.get_data()).get(ACTIVE_INLINE_MSG_ID_KEY)
+        try:
+            review_result = await with_analysis_indicator(
+                bot=message.bot,
+                chat_id=message.chat.id,
+                async_operation=review_operation
+            )
+        finally:
+            allow_invite = await stats_task
+        # Рецензия и инлайн-опции после неё — одним сообщением.
+        # id активного инлайн-сообщения берём из data, прочитанной в начале хода
+        prev_id = data.get(ACTIVE_INLINE_MSG_ID_KEY)
         if prev_id:
             await disable_buttons_by_id(message.bot, message.chat.id, prev_id)
-        after_msg = await message.answer(AIDemoConfig.AFTER_REVIEW_MESSAGE, parse_mode="Markdown", reply_markup=get_case_after_review_inline())
-        await state.update_data(**{ACTIVE_INLINE_MSG_ID_KEY: after_msg.message_id})
-        await state.set_state(AIChat.review_complete)
+        after_msg = await _answer_joined(
+            message,
+            review_result,
+            AIDemoConfig.AFTER_REVIEW_MESSAGE,
+            parse_mode="Markdown",
+            reply_markup=_AFTER_REVIEW_GENERIC_MARKUP,
+        )
+        await _enter_review_complete(state, after_msg.message_id)
         
         # В САМОМ КОНЦЕ отправляем приглашение к опросу
         try:
@@ -524,7 +770,7 @@ async def _process_user_input(user_text: str, message: Message, state: FSMContex
     else:
         if AIDemoConfig.SHOW_PROGRESS_INFO:
             progress_msg = (
-                f"\n\n{AIDemoConfig.PROGRESS_EMOJI} Ход {turn_count}/{AIDemoConfig.MAX_DIALOGUE_TURNS} | ПРОВД: {len(total_provd_achieved)}/5"
+                f"\n\n{AIDemoConfig.PROGRESS_EMOJI} Ход {turn_count}/{AIDemoConfig.MAX_DIALOGUE_TURNS} | ПРОВД: {provd_bitmap.bit_count()}/{len(_PROVD_BITS)}"
             )
             await message.answer(formatted_message + progress_msg, parse_mode="Markdown")
         else:
@@ -533,6 +779,7 @@ async def _process_user_input(user_text: str, message: Message, state: FSMContex
 
 @router.message(StateFilter(AIChat.waiting_user), F.text.len() > 0)
 @measure(case=AIDemoConfig.CASE_ID, step="user_turn")
+@_serialize_by_chat
 async def ai_demo_turn(message: Message, state: FSMContext, is_admin: bool) -> None:
     try:
         # Валидация входного текста
@@ -547,22 +794,21 @@ async def ai_demo_turn(message: Message, state: FSMContext, is_admin: bool) -> N
             # эмулируем клик по callback-кнопке
             await clear_case_conversations(AIDemoConfig.CASE_ID, message.from_user.id)
             await state.set_state(AIChat.waiting_user)
-            await state.update_data(turn_count=0, dialogue_entries=[], total_provd_achieved=set())
+            await state.update_data(turn_count=0, dialogue_entries=[], provd_bitmap=0)
             await message.answer(
                 AIDemoConfig.get_start_message(), 
                 parse_mode="Markdown", 
-                reply_markup=get_case_controls_reply()
+                reply_markup=_CONTROLS_REPLY_MARKUP
             )
             return
         if user_text == KB_BACK_TO_MENU:
             # Возврат в главное меню
             await clear_case_conversations(AIDemoConfig.CASE_ID, message.from_user.id)
             await state.clear()
-            from app.keyboards.menu import get_main_menu_inline
             await message.answer(
                 "🏠 Главное меню",
                 parse_mode="Markdown",
-                reply_markup=ReplyKeyboardRemove()
+                reply_markup=_REMOVE_KEYBOARD
             )
             await message.answer(
                 "Выберите кейс для тренировки:",
@@ -572,17 +818,13 @@ async def ai_demo_turn(message: Message, state: FSMContext, is_admin: bool) -> N
         if user_text == KB_CASE_REVIEW:
             data = await state.get_data()
             dialogue_entries = data.get("dialogue_entries", [])
-            session_id = f"{message.from_user.id}:{AIDemoConfig.CASE_ID}"
             
             # Инкрементируем completed при ручном завершении
-            try:
-                await mark_case_completed(message.from_user.id, AIDemoConfig.CASE_ID)
-            except Exception:
-                pass
+            _record_stat_in_background(mark_case_completed(message.from_user.id, AIDemoConfig.CASE_ID))
             
             # Показываем индикатор анализа при принудительном запросе
             async def review_operation():
-                return await perform_dialogue_review(dialogue_entries, session_id)
+                return await perform_dialogue_review(dialogue_entries, message.from_user.id)
             
             review_result = await with_analysis_indicator(
                 bot=message.bot,
@@ -590,17 +832,17 @@ async def ai_demo_turn(message: Message, state: FSMContext, is_admin: bool) -> N
                 async_operation=review_operation
             )
             # Скрываем reply-клавиатуру и показываем инлайн-опции
-            await message.answer(review_result, parse_mode="Markdown", reply_markup=ReplyKeyboardRemove())
+            await message.answer(review_result, parse_mode="Markdown", reply_markup=_REMOVE_KEYBOARD)
             
             # Задержка перед следующим сообщением
             await asyncio.sleep(1)
             
-            prev_id = (await state.get_data()).get(ACTIVE_INLINE_MSG_ID_KEY)
+            # data уже прочитана выше — повторный запрос к хранилищу не нужен
+            prev_id = data.get(ACTIVE_INLINE_MSG_ID_KEY)
             if prev_id:
                 await disable_buttons_by_id(message.bot, message.chat.id, prev_id)
-            after_msg = await message.answer(AIDemoConfig.AFTER_REVIEW_MESSAGE, parse_mode="Markdown", reply_markup=get_case_after_review_inline())
-            await state.update_data(**{ACTIVE_INLINE_MSG_ID_KEY: after_msg.message_id})
-            await state.set_state(AIChat.review_complete)
+            after_msg = await message.answer(AIDemoConfig.AFTER_REVIEW_MESSAGE, parse_mode="Markdown", reply_markup=_AFTER_REVIEW_GENERIC_MARKUP)
+            await _enter_review_complete(state, after_msg.message_id)
             
             # В САМОМ КОНЦЕ отправляем приглашение к опросу
             try:
@@ -622,6 +864,7 @@ async def ai_demo_turn(message: Message, state: FSMContext, is_admin: bool) -> N
 # Голосовой ввод: транскрибация → в общий процесс
 @router.message(StateFilter(AIChat.waiting_user), F.voice)
 @measure(case=AIDemoConfig.CASE_ID, step="user_turn_voice")
+@_serialize_by_chat
 async def ai_demo_turn_voice(message: Message, state: FSMContext, is_admin: bool) -> None:
     try:
         # Временное отключение валидации голосового сообщения для повышения робастности
@@ -637,7 +880,8 @@ async def ai_demo_turn_voice(message: Message, state: FSMContext, is_admin: bool
                 file = await message.bot.get_file(message.voice.file_id)
                 buffer = BytesIO()
                 await message.bot.download(file, buffer)
-                logger.debug(f"File downloaded: {len(buffer.getvalue())} bytes")
+                # tell() — размер без копирования буфера; transcribe_voice_ogg сам перематывает его в начало
+                logger.debug(f"File downloaded: {buffer.tell()} bytes")
                 # Транскрибуем
                 result = await transcribe_voice_ogg(buffer)
                 logger.info(f"Transcription completed: got {len(result)} characters")
@@ -680,95 +924,89 @@ async def ai_demo_turn_voice(message: Message, state: FSMContext, is_admin: bool
 async def ai_demo_after_review(message: Message, state: FSMContext) -> None:
     """Handle messages after dialogue review is complete."""
     # Скрываем reply-клавиатуру (покажем пустую) и выводим инлайн-опции
-    await message.answer(AIDemoConfig.AFTER_REVIEW_MESSAGE, parse_mode="Markdown", reply_markup=get_case_after_review_inline())
+    await message.answer(AIDemoConfig.AFTER_REVIEW_MESSAGE, parse_mode="Markdown", reply_markup=_AFTER_REVIEW_GENERIC_MARKUP)
 
 
-# Управляющие кнопки кейса
-@router.callback_query(F.data.startswith("case:fb_employee:"))
-async def case_controls_handler(callback: CallbackQuery, state: FSMContext):
-    """Обработчик всех контрольных кнопок для fb_employee"""
-    
-    # Определяем какую кнопку нажали
-    if callback.data.endswith("restart"):
-        # === КНОПКА RESTART ===
-        await clear_case_conversations(AIDemoConfig.CASE_ID, callback.from_user.id)
-        await state.clear()
-        await state.set_state(AIChat.waiting_user)
-        await state.update_data(
-            turn_count=0, 
-            dialogue_entries=[], 
-            total_provd_achieved=set(),
-            **{ACTIVE_INLINE_MSG_ID_KEY: None}
-        )
-        
-        if callback.message:
-            try:
-                await callback.message.edit_reply_markup(reply_markup=None)
-            except Exception:
-                pass
-            
-            await callback.message.answer(
-                AIDemoConfig.get_start_message(), 
-                parse_mode="Markdown", 
-                reply_markup=get_case_controls_inline_by_case(AIDemoConfig.CASE_ID)
-            )
-            
-            # Отправляем дополнительное сообщение про аудиозапись
-            await callback.message.answer(
-                AIDemoConfig.AUDIO_PROMPT_MESSAGE,
-                parse_mode="Markdown"
-            )
-        await callback.answer("Диалог принудительно перезапущен")
+# Управляющие кнопки кейса: точные значения callback_data вместо разбора суффикса
+@router.callback_query(F.data == CALLBACK_CASE_RESTART)
+async def case_fb_employee_restart(callback: CallbackQuery, state: FSMContext):
+    """Кнопка «Попробовать еще раз»: перезапуск диалога fb_employee."""
+    await clear_case_conversations(AIDemoConfig.CASE_ID, callback.from_user.id)
+    await state.clear()
+    await state.set_state(AIChat.waiting_user)
+    await state.update_data(
+        turn_count=0, 
+        dialogue_entries=[], 
+        provd_bitmap=0,
+        **{ACTIVE_INLINE_MSG_ID_KEY: None}
+    )
     
-    elif callback.data.endswith("review"):
-        # === КНОПКА REVIEW ===
-        current_state = await state.get_state()
-        if current_state != AIChat.waiting_user:
-            await callback.answer("Анализ доступен только во время активного диалога.")
-            return
-        
-        # Принудительный запуск рецензента по текущему диалогу
-        data = await state.get_data()
-        dialogue_entries = data.get("dialogue_entries", [])
-        session_id = f"{callback.from_user.id}:{AIDemoConfig.CASE_ID}"
-        
-        # Инкрементируем completed при ручном завершении и отправляем приглашение к опросу
+    if callback.message:
         try:
-            await mark_case_completed(callback.from_user.id, AIDemoConfig.CASE_ID)
-            if await acquire_rating_invite_lock(callback.from_user.id):
-                await send_survey_invitation(callback.bot, callback.message.chat.id, callback.from_user.id)
+            await callback.message.edit_reply_markup(reply_markup=None)
         except Exception:
             pass
         
-        # Показываем индикатор анализа при принудительном запросе через callback
-        async def review_operation():
-            return await perform_dialogue_review(dialogue_entries, session_id)
+        await callback.message.answer(
+            AIDemoConfig.get_start_message(), 
+            parse_mode="Markdown", 
+            reply_markup=_CONTROLS_MARKUP
+        )
         
-        review_result = await with_analysis_indicator(
-            bot=callback.bot,
-            chat_id=callback.message.chat.id,
-            async_operation=review_operation
+        # Отправляем дополнительное сообщение про аудиозапись
+        await callback.message.answer(
+            AIDemoConfig.AUDIO_PROMPT_MESSAGE,
+            parse_mode="Markdown"
         )
-        if callback.message:
-            # Отключаем кнопки в предыдущем инлайн-сообщении
-            data = await state.get_data()
-            prev_id = data.get(ACTIVE_INLINE_MSG_ID_KEY)
-            if prev_id:
-                await disable_buttons_by_id(callback.bot, callback.message.chat.id, prev_id)
-            # Скрываем reply и показываем инлайн-опции
-            await callback.message.answer(review_result, parse_mode="Markdown", reply_markup=ReplyKeyboardRemove())
-            
-            # Задержка перед следующим сообщением
-            await asyncio.sleep(1)
-            
-            # Показываем кнопки после рецензии
-            prev_id = (await state.get_data()).get(ACTIVE_INLINE_MSG_ID_KEY)
-            if prev_id:
-                await disable_buttons_by_id(callback.bot, callback.message.chat.id, prev_id)
-            after_msg = await callback.message.answer(
-                AIDemoConfig.AFTER_REVIEW_MESSAGE, 
-                parse_mode="Markdown", 
-                reply_markup=get_case_after_review_inline_by_case(AIDemoConfig.CASE_ID)
+    await callback.answer("Диалог принудительно перезапущен")
+
+
+@router.callback_query(F.data == CALLBACK_CASE_REVIEW)
+async def case_fb_employee_review(callback: CallbackQuery, state: FSMContext):
+    """Кнопка «Получить анализ»: принудительная рецензия текущего диалога fb_employee."""
+    current_state = await state.get_state()
+    if current_state != AIChat.waiting_user:
+        await callback.answer("Анализ доступен только во время активного диалога.")
+        return
+    
+    # Принудительный запуск рецензента по текущему диалогу
+    data = await state.get_data()
+    dialogue_entries = data.get("dialogue_entries", [])
+    
+    # Инкрементируем completed при ручном завершении и отправляем приглашение к опросу
+    _record_stat_in_background(mark_case_completed(callback.from_user.id, AIDemoConfig.CASE_ID))
+    try:
+        if await acquire_rating_invite_lock(callback.from_user.id):
+            await send_survey_invitation(callback.bot, callback.message.chat.id, callback.from_user.id)
+    except Exception:
+        pass
+    
+    # Показываем индикатор анализа при принудительном запросе через callback
+    async def review_operation():
+        return await perform_dialogue_review(dialogue_entries, callback.from_user.id)
+    
+    review_result = await with_analysis_indicator(
+        bot=callback.bot,
+        chat_id=callback.message.chat.id,
+        async_operation=review_operation
+    )
+    if callback.message:
+        # Отключаем кнопки в предыдущем инлайн-сообщении.
+        # data прочитана в начале обработчика, ключ с тех пор никто не записывал
+        prev_id = data.get(ACTIVE_INLINE_MSG_ID_KEY)
+        # Скрываем reply и показываем инлайн-опции
+        review_sent_at = time.monotonic()
+        review_send = callback.message.answer(review_result, parse_mode="Markdown", reply_markup=_REMOVE_KEYBOARD)
+        if prev_id:
+            # Правка старого сообщения и отправка рецензии независимы — одним окном ожидания.
+            # disable_buttons_by_id сам глушит ошибки, так что сбой правки не теряет рецензию
+            await asyncio.gather(
+                review_send,
+                disable_buttons_by_id(callback.bot, callback.message.chat.id, prev_id),
             )
-            await state.update_data(**{ACTIVE_INLINE_MSG_ID_KEY: after_msg.message_id})
-            await state.set_state(AIChat.review_complete)
+        else:
+            await review_send
+        await state.set_state(AIChat.review_complete)
+        
+        # Кнопки после рецензии показываем через паузу фоновой задачей — обработчик не ждёт её
+        _schedule_after_review_followup(callback.message, state, review_sent_at, prev_id)
@@ -65,6 +65,7 @@ class Settings(BaseSettings):
     AI_REQUEST_TIMEOUT_SEC: float = Field(default=30.0, description="Таймаут запроса к AI провайдеру (сек)")
     AI_REQUEST_MAX_RETRIES: int = Field(default=3, description="Максимум попыток запроса к AI провайдеру")
     AI_REQUEST_RETRY_BACKOFF_SEC: float = Field(default=1.5, description="Бэкофф между ретраями (сек)")
+    AI_MAX_CONCURRENT_REQUESTS: int = Field(default=50, description="Максимум одновременных запросов к AI провайдерам на процесс")
 
     # Таймауты и ретраи транскрибации
     TRANSCRIBE_TIMEOUT_SEC: float = Field(default=25.0, description="Таймаут транскрибации (сек)")
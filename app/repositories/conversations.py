@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from app.config.settings import Settings
+from app.services.auth import normalize_db_url
+
+# На сколько месяцев вперёд держать готовые секции: пропуск нескольких запусков
+# задачи или простой бота на границе месяцев не отправляет записи в DEFAULT
+_PARTITION_MONTHS_AHEAD = 3
+
+
+async def _connect():
+    settings = Settings()
+    if not settings.DATABASE_URL:
+        return None
+    import asyncpg
+    url = normalize_db_url(settings.DATABASE_URL)
+    return await asyncpg.connect(url, timeout=10)
+
+
+async def ensure_conversation_partitions() -> None:
+    """Создаёт месячные секции conversations с текущего месяца на несколько вперёд.
+
+    Месяцы, строки которых уже попали в DEFAULT, тоже получают свои секции:
+    conversations_ensure_partition переносит эти строки из DEFAULT.
+    """
+    conn = await _connect()
+    if conn is None:
+        return None
+    try:
+        stray_months = await conn.fetch(
+            "select distinct date_trunc('month', created_at at time zone 'UTC') at time zone 'UTC' as month "
+            "from conversations_default"
+        )
+        # Каждый вызов — своя транзакция: сбой одного месяца не откатывает остальные
+        for row in stray_months:
+            await conn.execute("select conversations_ensure_partition($1)", row["month"])
+        for months in range(_PARTITION_MONTHS_AHEAD + 1):
+            await conn.execute("select conversations_ensure_partition(now() + make_interval(months => $1))", months)
+    finally:
+        await conn.close()
@@ -2,6 +2,7 @@
 Сервис для инициализации и управления AI провайдерами.
 """
 
+import asyncio
 import logging
 from typing import List, Set
 
@@ -19,6 +20,18 @@ from app.storage import PostgresStorage, InMemoryStorage
 
 logger = logging.getLogger(__name__)
 
+# Общий лимит одновременных запросов к AI: при всплеске нагрузки запросы ждут в очереди,
+# а не упираются все разом в лимиты провайдера. Создаётся при первом запросе
+_request_semaphore: asyncio.Semaphore | None = None
+
+
+def _get_request_semaphore() -> asyncio.Semaphore:
+    """Возвращает семафор, ограничивающий число одновременных запросов к AI."""
+    global _request_semaphore
+    if _request_semaphore is None:
+        _request_semaphore = asyncio.Semaphore(max(1, Settings().AI_MAX_CONCURRENT_REQUESTS))
+    return _request_semaphore
+
 
 def initialize_ai_providers() -> None:
     """Инициализирует доступные AI провайдеры"""
@@ -109,14 +122,15 @@ async def send_case_message(
             settings.provider.value,
             settings.model,
         )
-        response = await gateway.send_message(
-            user_id=user_id,
-            message=message,
-            system_prompt=system_prompt,
-            provider_type=settings.provider,
-            model_override=settings.model,
-            audio_bytes=audio_bytes,
-        )
+        async with _get_request_semaphore():
+            response = await gateway.send_message(
+                user_id=user_id,
+                message=message,
+                system_prompt=system_prompt,
+                provider_type=settings.provider,
+                model_override=settings.model,
+                audio_bytes=audio_bytes,
+            )
         if response.success:
             logger.info(
                 "AI response: case=%s channel=%s provider=%s model=%s",
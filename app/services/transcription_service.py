@@ -11,11 +11,23 @@ from app.config.settings import Settings
 
 logger = logging.getLogger(__name__)
 
+# Клиент OpenAI переиспользуется между вызовами: его пул HTTP-соединений остаётся открытым,
+# и загрузка следующего голосового обходится без нового TCP/TLS-рукопожатия
+_CLIENTS: dict[str, OpenAI] = {}
+
+
+def _get_client(api_key: str) -> OpenAI:
+    """Возвращает клиент OpenAI для ключа, создавая его при первом обращении."""
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        client = _CLIENTS[api_key] = OpenAI(api_key=api_key)
+    return client
+
 
 async def transcribe_voice_ogg(bytes_io: BytesIO) -> str:
     """Транскрибирует голосовое через OpenAI gpt-4o-transcribe с ретраями и таймаутом."""
     settings = Settings()
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    client = _get_client(settings.OPENAI_API_KEY)
 
     async def _call_once(model_name: str) -> str:
         try:
@@ -23,6 +23,27 @@ def _normalize_db_url(database_url: Optional[str]) -> Optional[str]:
     return database_url.replace("postgresql+asyncpg://", "postgresql://")
 
 
+def _dump_data(data: Dict[str, Any]) -> str:
+    """Сериализует данные FSM в JSON (set конвертируется в list)."""
+    serializable_data = {}
+    for k, v in data.items():
+        if isinstance(v, set):
+            serializable_data[k] = list(v)
+        else:
+            serializable_data[k] = v
+    return json.dumps(serializable_data)
+
+
+def _load_data(raw: str) -> Dict[str, Any]:
+    """Десериализует данные FSM из JSON (list восстанавливается в set)."""
+    data = json.loads(raw)
+
+    # Восстанавливаем set из list (для total_provd_achieved и т.д.)
+    if "total_provd_achieved" in data and isinstance(data["total_provd_achieved"], list):
+        data["total_provd_achieved"] = set(data["total_provd_achieved"])
+    return data
+
+
 class PostgresFSMStorage(BaseStorage):
     """
     PostgreSQL хранилище для FSM состояний aiogram.
@@ -105,15 +126,12 @@ class PostgresFSMStorage(BaseStorage):
 
             await conn.execute(
                 """
-                INSERT INTO fsm_storage (storage_key, bot_id, chat_id, user_id, state, data, updated_at)
-                VALUES ($1, $2, $3, $4, $5, '{}', NOW())
+                INSERT INTO fsm_storage (storage_key, state, data, updated_at)
+                VALUES ($1, $2, '{}', NOW())
                 ON CONFLICT (storage_key) 
-                DO UPDATE SET state = $5, updated_at = NOW()
+                DO UPDATE SET state = $2, updated_at = NOW()
                 """,
                 storage_key,
-                key.bot_id,
-                key.chat_id,
-                key.user_id,
                 state_str,
             )
             logger.debug(f"Saved FSM state: key={storage_key}, state={state_str}")
@@ -172,28 +190,16 @@ class PostgresFSMStorage(BaseStorage):
 
         try:
             storage_key = self._make_key(key)
-            
-            # Конвертируем set в list для JSON сериализации
-            serializable_data = {}
-            for k, v in data.items():
-                if isinstance(v, set):
-                    serializable_data[k] = list(v)
-                else:
-                    serializable_data[k] = v
-            
-            data_json = json.dumps(serializable_data)
+            data_json = _dump_data(data)
 
             await conn.execute(
                 """
-                INSERT INTO fsm_storage (storage_key, bot_id, chat_id, user_id, state, data, updated_at)
-                VALUES ($1, $2, $3, $4, NULL, $5, NOW())
+                INSERT INTO fsm_storage (storage_key, state, data, updated_at)
+                VALUES ($1, NULL, $2, NOW())
                 ON CONFLICT (storage_key) 
-                DO UPDATE SET data = $5, updated_at = NOW()
+                DO UPDATE SET data = $2, updated_at = NOW()
                 """,
                 storage_key,
-                key.bot_id,
-                key.chat_id,
-                key.user_id,
                 data_json,
             )
             logger.debug(f"Saved FSM data: key={storage_key}, data_size={len(data)}")
@@ -227,12 +233,7 @@ class PostgresFSMStorage(BaseStorage):
             )
 
             if row and row["data"]:
-                data = json.loads(row["data"])
-                
-                # Восстанавливаем set из list (для total_provd_achieved и т.д.)
-                if "total_provd_achieved" in data and isinstance(data["total_provd_achieved"], list):
-                    data["total_provd_achieved"] = set(data["total_provd_achieved"])
-                
+                data = _load_data(row["data"])
                 logger.debug(f"Loaded FSM data: key={storage_key}, data_size={len(data)}")
                 return data
             return {}
@@ -243,6 +244,103 @@ class PostgresFSMStorage(BaseStorage):
         finally:
             await conn.close()
 
+    async def update_data(self, key: StorageKey, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Частично обновляет данные FSM (как dict.update) одним запросом.
+
+        В отличие от BaseStorage.update_data (get_data + set_data, два подключения
+        и перезапись всего JSON) в БД уходят только изменённые ключи, а слияние
+        делает Postgres через оператор jsonb ||.
+
+        Args:
+            key: Ключ хранилища
+            data: Изменённые ключи
+
+        Returns:
+            Полные данные после обновления
+        """
+        conn = await self._connect()
+        if conn:
+            try:
+                storage_key = self._make_key(key)
+                row = await conn.fetchrow(
+                    """
+                    INSERT INTO fsm_storage (storage_key, state, data, updated_at)
+                    VALUES ($1, NULL, $2::jsonb, NOW())
+                    ON CONFLICT (storage_key)
+                    DO UPDATE SET data = fsm_storage.data || EXCLUDED.data, updated_at = NOW()
+                    RETURNING data
+                    """,
+                    storage_key,
+                    _dump_data(data),
+                )
+                logger.debug(f"Updated FSM data: key={storage_key}, keys={list(data)}")
+                if row and row["data"]:
+                    return _load_data(row["data"])
+            except Exception as e:
+                logger.error(f"Ошибка обновления FSM data в БД: {e}")
+            finally:
+                await conn.close()
+
+        # Запись не удалась: вызывающий код ждёт полные данные (контракт
+        # FSMContext.update_data), поэтому сливаем изменения с сохранёнными
+        current = await self.get_data(key)
+        current.update(data)
+        return current
+
+    async def append_data(
+        self,
+        key: StorageKey,
+        field: str,
+        items: list,
+        data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Дописывает элементы в список-поле данных FSM и обновляет остальные ключи.
+
+        Растущий список (например, история диалога) не перезаписывается
+        целиком: в БД уходят только новые элементы, конкатенацию делает Postgres.
+
+        Args:
+            key: Ключ хранилища
+            field: Имя поля со списком
+            items: Новые элементы списка
+            data: Прочие изменённые ключи (как в update_data)
+        """
+        conn = await self._connect()
+        if conn:
+            try:
+                storage_key = self._make_key(key)
+                await conn.execute(
+                    """
+                    INSERT INTO fsm_storage (storage_key, state, data, updated_at)
+                    VALUES ($1, NULL, jsonb_set($2::jsonb, ARRAY[$3::text], $4::jsonb), NOW())
+                    ON CONFLICT (storage_key)
+                    DO UPDATE SET data = jsonb_set(
+                        fsm_storage.data || EXCLUDED.data,
+                        ARRAY[$3::text],
+                        COALESCE(fsm_storage.data -> $3::text, '[]'::jsonb) || $4::jsonb
+                    ), updated_at = NOW()
+                    """,
+                    storage_key,
+                    _dump_data(data or {}),
+                    field,
+                    json.dumps(items),
+                )
+                logger.debug(f"Appended FSM data: key={storage_key}, field={field}, items={len(items)}")
+                return
+            except Exception as e:
+                logger.error(f"Ошибка дозаписи FSM data в БД: {e}")
+            finally:
+                await conn.close()
+
+        # Дозапись не удалась: пробуем записать ход целиком, как BaseStorage.update_data,
+        # иначе реплики молча пропадут из истории, которую читает рецензент
+        current = await self.get_data(key)
+        current.update(data or {})
+        current[field] = [*current.get(field, []), *items]
+        await self.set_data(key, current)
+
     async def close(self) -> None:
         """Закрывает соединение с БД (если нужно)."""
         # В текущей реализации каждый запрос открывает/закрывает соединение
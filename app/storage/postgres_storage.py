@@ -107,7 +107,7 @@ class PostgresStorage(ConversationStorage):
             async with pool.acquire() as conn:
                 await conn.execute(
                 """
-                INSERT INTO conversations (user_id, provider_type, role, content, metadata, created_at)
+                INSERT INTO conversations (user_id, provider_type, role, content, meta, created_at)
                 VALUES ($1, $2, $3, $4, $5, NOW())
                 """,
                 user_id,
@@ -143,7 +143,7 @@ class PostgresStorage(ConversationStorage):
             try:
                 rows = await conn.fetch(
                     """
-                    SELECT role, content, metadata
+                    SELECT role, content, meta
                     FROM conversations
                     WHERE user_id = $1 AND provider_type = $2 AND finished_at IS NULL
                     ORDER BY created_at ASC
@@ -154,7 +154,7 @@ class PostgresStorage(ConversationStorage):
 
                 messages = []
                 for row in rows:
-                    metadata = json.loads(row["metadata"]) if row["metadata"] else {}
+                    metadata = json.loads(row["meta"]) if row["meta"] else {}
                     messages.append(
                         AIMessage(
                             role=row["role"],
@@ -9,14 +9,18 @@
 - Создаёт Bot/Dispatcher/Router (aiogram v3) и обрабатывает /start.
 - Запускает polling (dev) или webhook (production).
 - Graceful shutdown для zero-downtime deploys.
+- Использует цикл событий uvloop, если он установлен.
+- Разбирает/собирает JSON запросов к Bot API через orjson, если он установлен.
 """
 
 import asyncio
 import logging
 import signal
 from contextlib import asynccontextmanager
+from datetime import datetime
 
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiohttp import web
@@ -35,6 +39,7 @@ from app.handlers.rating import router as rating_router
 from app.handlers.help import router as help_router
 from app.handlers.fallback import router as fallback_router
 from app.services.auth import run_migrations, normalize_db_url
+from app.repositories.conversations import ensure_conversation_partitions
 from app.services.ai_service import initialize_ai_providers
 from app.middlewares.errors import ErrorsMiddleware
 from app.middlewares.roles import RolesMiddleware
@@ -61,6 +66,22 @@ except Exception:
 # -----------------------------
 
 
+# -----------------------------
+# HTTP-сессия Bot API
+# -----------------------------
+def create_bot_session() -> AiohttpSession:
+    """Создаёт сессию Bot API; ответы Telegram и вложенные поля запросов кодируются orjson, если он есть."""
+    try:
+        import orjson
+    except ImportError:
+        return AiohttpSession()
+    # aiogram ждёт от json_dumps строку, orjson отдаёт bytes
+    return AiohttpSession(
+        json_loads=orjson.loads,
+        json_dumps=lambda value: orjson.dumps(value).decode(),
+    )
+
+
 # -----------------------------
 # Глобальные переменные для graceful shutdown
 # -----------------------------
@@ -149,11 +170,26 @@ async def main() -> None:
         except Exception as e:
             logger = logging.getLogger("sheets_export")
             logger.warning(f"Экспортёр Google Sheets не инициализирован: {e}")
+    # Месячные секции conversations создаём заранее, чтобы записи не копились в DEFAULT
+    if settings.DATABASE_URL:
+        async def partitions_job():
+            try:
+                await ensure_conversation_partitions()
+            except Exception as e:
+                logging.getLogger("conversations").warning(f"Не удалось создать секции conversations: {e}")
+        # Первый запуск сразу — через планировщик, он держит ссылку на задачу до её завершения
+        scheduler.add_job(
+            partitions_job,
+            "interval",
+            hours=12,
+            id="conversations_partitions",
+            next_run_time=datetime.now(),
+        )
     scheduler.start()
     logger.info("Планировщик APScheduler запущен")
 
     # 5) Инициализация aiogram (Bot, Dispatcher, Routers)
-    bot = Bot(token=settings.BOT_TOKEN)
+    bot = Bot(token=settings.BOT_TOKEN, session=create_bot_session())
     dp = Dispatcher(storage=fsm_storage)
     # Global middlewares: errors and roles context
     dp.update.outer_middleware(ErrorsMiddleware())
@@ -275,8 +311,16 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
+    # uvloop быстрее стандартного цикла событий на сетевом I/O; на Windows не ставится — там asyncio
     try:
-        asyncio.run(main())
+        import uvloop
+    except ImportError:
+        uvloop = None
+    try:
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except (KeyboardInterrupt, SystemExit):
         # Нормальное завершение по Ctrl+C / сигналы ОС
         pass
\ No newline at end of file
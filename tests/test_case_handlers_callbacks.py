@@ -9,14 +9,19 @@
 Тестируемые хэндлеры:
 - case_*_start_dialog (начало диалога)
 - case_*_theory (теория/PDF)
-- case_controls_handler (restart/review кнопки)
+- case_controls_handler / case_fb_employee_restart / case_fb_employee_review (restart/review кнопки)
 """
 
+import asyncio
+import time
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch, mock_open
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, User, Chat, Message, FSInputFile
 
+import app.cases.career_dialog.handler as career_handler
+import app.cases.fb_employee.handler as employee_handler
 from app.cases.career_dialog.handler import (
     case_career_dialog_start_dialog,
     case_career_dialog_theory,
@@ -32,7 +37,8 @@ from app.cases.fb_peer.handler import (
 from app.cases.fb_employee.handler import (
     case_fb_employee_start_dialog,
     case_fb_employee_theory,
-    case_controls_handler as employee_controls_handler,
+    case_fb_employee_restart as employee_restart_handler,
+    case_fb_employee_review as employee_review_handler,
     AIChat,
 )
 from app.cases.career_dialog.config import CareerDialogConfig
@@ -40,6 +46,14 @@ from app.cases.fb_peer.config import FBPeerConfig
 from app.cases.fb_employee.config import AIDemoConfig
 
 
+@pytest.fixture
+def employee_background_tasks(monkeypatch):
+    """Свой набор фоновых задач fb_employee на тест: тест ждёт только созданные им задачи"""
+    tasks = set()
+    monkeypatch.setattr(employee_handler, "_BACKGROUND_TASKS", tasks)
+    return tasks
+
+
 def create_mock_message(user_id: int = 12345, chat_id: int = 12345) -> Message:
     """Создает мок-объект Message для тестов"""
     message = MagicMock(spec=Message)
@@ -137,8 +151,8 @@ class TestCareerDialogStartDialog:
             state.update_data.assert_called()
             call_kwargs = state.update_data.call_args[1]
             assert call_kwargs["turn_count"] == 0
-            assert call_kwargs["dialogue_entries"] == []
-            assert isinstance(call_kwargs["total_components_achieved"], set)
+            assert call_kwargs["dialogue_texts"] == []
+            assert call_kwargs["components_bitmap"] == 0
 
     @pytest.mark.asyncio
     async def test_start_dialog_marks_case_started(self):
@@ -186,6 +200,62 @@ class TestFBPeerStartDialog:
             state.set_state.assert_called_with(FBPeerChat.waiting_user)
             assert callback.message.answer.call_count >= 2
 
+    @pytest.mark.asyncio
+    async def test_fbemployee_start_resets_data_in_one_write(self):
+        """Тест: данные диалога сбрасываются одной записью вместе со сменой состояния"""
+        callback = create_mock_callback(data="case:fb_employee:start")
+        state = create_mock_state()
+        
+        with patch("app.cases.fb_employee.handler.clear_case_conversations", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.mark_case_started", new_callable=AsyncMock):
+            
+            await case_fb_employee_start_dialog(callback, state)
+            
+            state.set_state.assert_called_once_with(AIChat.waiting_user)
+            state.update_data.assert_called_once_with({
+                "turn_count": 0,
+                "dialogue_entries": [],
+                "provd_bitmap": 0,
+                "active_inline_message_id": None,
+            })
+
+    @pytest.mark.asyncio
+    async def test_fbemployee_start_does_not_wait_for_stats(self, employee_background_tasks):
+        """Тест: счётчик старта пишется в фоне и не задерживает ответ"""
+        callback = create_mock_callback(data="case:fb_employee:start")
+        state = create_mock_state()
+        never_done = asyncio.Event()
+
+        async def slow_stat(*args):
+            await never_done.wait()
+
+        with patch("app.cases.fb_employee.handler.clear_case_conversations", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.mark_case_started", side_effect=slow_stat) as mock_started:
+            
+            await asyncio.wait_for(case_fb_employee_start_dialog(callback, state), timeout=1)
+            
+            mock_started.assert_called_once_with(callback.from_user.id, AIDemoConfig.CASE_ID)
+            assert callback.message.answer.call_count >= 2
+        never_done.set()
+        await asyncio.gather(*employee_background_tasks)
+
+    @pytest.mark.asyncio
+    async def test_fbemployee_start_survives_stats_failure(self, employee_background_tasks):
+        """Тест: ошибка записи статистики только логируется"""
+        callback = create_mock_callback(data="case:fb_employee:start")
+        state = create_mock_state()
+
+        with patch("app.cases.fb_employee.handler.clear_case_conversations", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.mark_case_started", new_callable=AsyncMock, side_effect=Exception("DB error")):
+            
+            await case_fb_employee_start_dialog(callback, state)
+            await asyncio.gather(*employee_background_tasks)
+            
+            state.set_state.assert_called_with(AIChat.waiting_user)
+
 
 class TestFBEmployeeStartDialog:
     """Тесты для case_fb_employee_start_dialog"""
@@ -209,6 +279,13 @@ class TestFBEmployeeStartDialog:
 class TestCareerDialogTheory:
     """Тесты для case_career_dialog_theory"""
 
+    @pytest.fixture(autouse=True)
+    def reset_pdf_file_id(self):
+        """Сбрасывает закэшированный file_id PDF между тестами"""
+        career_handler._PDF_FILE_ID = None
+        yield
+        career_handler._PDF_FILE_ID = None
+
     @pytest.mark.asyncio
     async def test_theory_sends_pdf(self):
         """Тест: отправка PDF с теорией"""
@@ -240,6 +317,67 @@ class TestCareerDialogTheory:
             answer_kwargs = callback.answer.call_args[1]
             assert answer_kwargs.get("show_alert") is True
 
+    @pytest.mark.asyncio
+    async def test_theory_reuses_cached_file_id(self):
+        """Тест: повторная отправка PDF идёт по file_id без загрузки файла"""
+        callback = create_mock_callback(data="case:career_dialog:theory")
+        state = create_mock_state()
+        sent = MagicMock()
+        sent.document.file_id = "pdf-file-id"
+        callback.message.answer_document = AsyncMock(return_value=sent)
+
+        with patch("app.cases.career_dialog.handler.disable_buttons_by_id", new_callable=AsyncMock):
+            await case_career_dialog_theory(callback, state)
+            await case_career_dialog_theory(callback, state)
+
+        first_call, second_call = callback.message.answer_document.call_args_list
+        assert isinstance(first_call.args[0], FSInputFile)
+        assert second_call.args[0] == "pdf-file-id"
+
+    @pytest.mark.asyncio
+    async def test_theory_reuploads_when_file_id_rejected(self):
+        """Тест: при отклонённом file_id PDF загружается заново"""
+        callback = create_mock_callback(data="case:career_dialog:theory")
+        state = create_mock_state()
+        career_handler._PDF_FILE_ID = "stale-file-id"
+        sent = MagicMock()
+        sent.document.file_id = "fresh-file-id"
+        callback.message.answer_document = AsyncMock(side_effect=[
+            TelegramBadRequest(method=MagicMock(), message="wrong file identifier"),
+            sent,
+        ])
+
+        with patch("app.cases.career_dialog.handler.disable_buttons_by_id", new_callable=AsyncMock):
+            await case_career_dialog_theory(callback, state)
+
+        assert callback.message.answer_document.call_count == 2
+        assert isinstance(callback.message.answer_document.call_args.args[0], FSInputFile)
+        assert career_handler._PDF_FILE_ID == "fresh-file-id"
+        callback.answer.assert_called_once_with("📄 PDF отправлен ✅")
+
+    @pytest.mark.asyncio
+    async def test_theory_does_not_wait_for_disabling_buttons(self):
+        """Тест: отключение старых кнопок идёт в фоне и не задерживает отправку PDF"""
+        callback = create_mock_callback(data="case:career_dialog:theory")
+        state = create_mock_state(data={"active_inline_message_id": 99})
+        never_done = asyncio.Event()
+
+        async def slow_disable(*args):
+            await never_done.wait()
+
+        with patch("app.cases.career_dialog.handler.disable_buttons_by_id", side_effect=slow_disable):
+            await asyncio.wait_for(case_career_dialog_theory(callback, state), timeout=1)
+
+        callback.message.answer_document.assert_called_once()
+        assert len(career_handler._BACKGROUND_TASKS) == 1
+        tasks = list(career_handler._BACKGROUND_TASKS)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+        # Завершённые задачи убираются из набора
+        assert not career_handler._BACKGROUND_TASKS
+
     @pytest.mark.asyncio
     async def test_theory_disables_previous_buttons(self):
         """Тест: отключение предыдущих кнопок"""
@@ -275,6 +413,13 @@ class TestFBPeerTheory:
 class TestFBEmployeeTheory:
     """Тесты для case_fb_employee_theory"""
 
+    @pytest.fixture(autouse=True)
+    def reset_pdf_file_id(self):
+        """Сбрасывает закэшированный file_id PDF между тестами"""
+        employee_handler._PDF_FILE_ID = None
+        yield
+        employee_handler._PDF_FILE_ID = None
+
     @pytest.mark.asyncio
     async def test_fbemployee_theory_sends_correct_pdf(self):
         """Тест: отправка правильного PDF для fb_employee"""
@@ -288,6 +433,44 @@ class TestFBEmployeeTheory:
             
             callback.message.answer_document.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_fbemployee_theory_reuses_cached_file_id(self):
+        """Тест: повторная отправка PDF идёт по file_id без загрузки файла"""
+        callback = create_mock_callback(data="case:fb_employee:theory")
+        state = create_mock_state()
+        sent = MagicMock()
+        sent.document.file_id = "pdf-file-id"
+        callback.message.answer_document = AsyncMock(return_value=sent)
+
+        with patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock):
+            await case_fb_employee_theory(callback, state)
+            await case_fb_employee_theory(callback, state)
+
+        first_call, second_call = callback.message.answer_document.call_args_list
+        assert isinstance(first_call.args[0], FSInputFile)
+        assert first_call.args[0].path == "static/pdfs/razgovor_s_podchinennym.pdf"
+        assert second_call.args[0] == "pdf-file-id"
+
+    @pytest.mark.asyncio
+    async def test_fbemployee_theory_reuploads_when_file_id_rejected(self):
+        """Тест: при отклонённом file_id PDF загружается заново"""
+        callback = create_mock_callback(data="case:fb_employee:theory")
+        state = create_mock_state()
+        employee_handler._PDF_FILE_ID = "stale-file-id"
+        sent = MagicMock()
+        sent.document.file_id = "fresh-file-id"
+        callback.message.answer_document = AsyncMock(side_effect=[
+            TelegramBadRequest(method=MagicMock(), message="wrong file identifier"),
+            sent,
+        ])
+
+        with patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock):
+            await case_fb_employee_theory(callback, state)
+
+        assert callback.message.answer_document.call_count == 2
+        assert employee_handler._PDF_FILE_ID == "fresh-file-id"
+        callback.answer.assert_called_once_with("📄 PDF отправлен ✅")
+
 
 class TestCareerControlsRestart:
     """Тесты для кнопки restart (career_dialog)"""
@@ -323,7 +506,7 @@ class TestCareerControlsRestart:
             state.update_data.assert_called()
             call_kwargs = state.update_data.call_args[1]
             assert call_kwargs["turn_count"] == 0
-            assert call_kwargs["dialogue_entries"] == []
+            assert call_kwargs["dialogue_texts"] == []
 
     @pytest.mark.asyncio
     async def test_restart_disables_buttons(self):
@@ -347,10 +530,7 @@ class TestCareerControlsReview:
         callback = create_mock_callback(data="case:career_dialog:review")
         state = create_mock_state(
             state_value=CareerChat.waiting_user,
-            data={"dialogue_entries": [
-                {"role": "Руководитель", "text": "Привет"},
-                {"role": "Максим", "text": "Здравствуйте"}
-            ]}
+            data={"dialogue_texts": ["Привет", "Здравствуйте"]}
         )
         
         # Мокаем рецензента
@@ -386,7 +566,7 @@ class TestCareerControlsReview:
         callback = create_mock_callback(data="case:career_dialog:review")
         state = create_mock_state(
             state_value=CareerChat.waiting_user,
-            data={"dialogue_entries": [{"role": "Руководитель", "text": "Текст"}]}
+            data={"dialogue_texts": ["Текст"]}
         )
         
         with patch("app.cases.career_dialog.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="OK"), \
@@ -406,7 +586,7 @@ class TestCareerControlsReview:
         callback = create_mock_callback(data="case:career_dialog:review")
         state = create_mock_state(
             state_value=CareerChat.waiting_user,
-            data={"dialogue_entries": [{"role": "Руководитель", "text": "Текст"}]}
+            data={"dialogue_texts": ["Текст"]}
         )
         
         with patch("app.cases.career_dialog.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="OK"), \
@@ -421,6 +601,173 @@ class TestCareerControlsReview:
             # Проверяем что приглашение к опросу отправлено
             mock_survey.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_review_disables_previous_inline_buttons(self):
+        """Тест: кнопки прошлого инлайн-сообщения отключаются вместе с отправкой рецензии"""
+        callback = create_mock_callback(data="case:career_dialog:review")
+        callback.message.chat.id = 12345
+        after_msg = MagicMock()
+        after_msg.message_id = 101
+        callback.message.answer = AsyncMock(return_value=after_msg)
+        state = create_mock_state(
+            state_value=CareerChat.waiting_user,
+            data={"dialogue_texts": ["Текст"], "active_inline_message_id": 100}
+        )
+        
+        with patch("app.cases.career_dialog.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.career_dialog.handler.with_analysis_indicator", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.career_dialog.handler.mark_case_completed", new_callable=AsyncMock), \
+             patch("app.cases.career_dialog.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.career_dialog.handler.disable_buttons_by_id", new_callable=AsyncMock) as mock_disable:
+            
+            await career_controls_handler(callback, state)
+            
+            mock_disable.assert_called_once_with(callback.bot, 12345, 100)
+            callback.message.answer.assert_called_once()
+            assert callback.message.answer.call_args.args[0].startswith("OK\n\n")
+            state.update_data.assert_any_call({"active_inline_message_id": 101})
+
+    @pytest.mark.asyncio
+    async def test_review_splits_long_review(self):
+        """Тест: длинная рецензия уходит отдельным сообщением, кнопки — на сообщении с опциями"""
+        callback = create_mock_callback(data="case:career_dialog:review")
+        long_review = "Р" * 4090
+        state = create_mock_state(
+            state_value=CareerChat.waiting_user,
+            data={"dialogue_texts": ["Текст"]}
+        )
+
+        with patch("app.cases.career_dialog.handler.perform_dialogue_review", new_callable=AsyncMock, return_value=long_review), \
+             patch("app.cases.career_dialog.handler.with_analysis_indicator", new_callable=AsyncMock, return_value=long_review), \
+             patch("app.cases.career_dialog.handler.mark_case_completed", new_callable=AsyncMock), \
+             patch("app.cases.career_dialog.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.career_dialog.handler.disable_buttons_by_id", new_callable=AsyncMock):
+
+            await career_controls_handler(callback, state)
+
+            review_call, options_call = callback.message.answer.call_args_list
+            assert review_call.args[0] == long_review
+            assert options_call.args[0] == CareerDialogConfig.AFTER_REVIEW_MESSAGE
+            assert options_call.kwargs["reply_markup"] is career_handler._AFTER_REVIEW_MARKUP
+
+    @pytest.mark.asyncio
+    async def test_review_acks_callback(self):
+        """Тест: нажатие «Анализ» подтверждается, даже если ответ на callback не удался"""
+        callback = create_mock_callback(data="case:career_dialog:review")
+        callback.answer = AsyncMock(side_effect=Exception("query is too old"))
+        state = create_mock_state(
+            state_value=CareerChat.waiting_user,
+            data={"dialogue_texts": ["Текст"]}
+        )
+
+        with patch("app.cases.career_dialog.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.career_dialog.handler.with_analysis_indicator", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.career_dialog.handler.mark_case_completed", new_callable=AsyncMock), \
+             patch("app.cases.career_dialog.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.career_dialog.handler.disable_buttons_by_id", new_callable=AsyncMock):
+
+            await career_controls_handler(callback, state)
+
+            callback.answer.assert_called_once_with()
+            callback.message.answer.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_review_double_click_runs_once(self):
+        """Тест: двойной клик по «Анализ» запускает рецензию один раз"""
+        callback = create_mock_callback(data="case:career_dialog:review")
+        callback.message.chat.id = 12345
+        state = create_mock_state(
+            state_value=CareerChat.waiting_user,
+            data={"dialogue_texts": ["Текст"]}
+        )
+        current = {"state": CareerChat.waiting_user}
+        state.get_state = AsyncMock(side_effect=lambda: current["state"])
+
+        async def set_state(value):
+            current["state"] = value
+        state.set_state = AsyncMock(side_effect=set_state)
+
+        with patch("app.cases.career_dialog.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.career_dialog.handler.with_analysis_indicator", new_callable=AsyncMock, return_value="OK") as mock_indicator, \
+             patch("app.cases.career_dialog.handler.mark_case_completed", new_callable=AsyncMock), \
+             patch("app.cases.career_dialog.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.career_dialog.handler.disable_buttons_by_id", new_callable=AsyncMock):
+
+            await asyncio.gather(
+                career_controls_handler(callback, state),
+                career_controls_handler(callback, state),
+            )
+
+            mock_indicator.assert_called_once()
+            callback.message.answer.assert_called_once()
+            assert 12345 not in career_handler._REVIEW_LOCKS
+            assert 12345 not in career_handler._REVIEW_LOCK_USERS
+
+    @pytest.mark.asyncio
+    async def test_review_late_click_waits_for_queued_click(self):
+        """Тест: третье нажатие после завершения первого ждёт уже стоящее в очереди"""
+        callback = create_mock_callback(data="case:career_dialog:review")
+        state = create_mock_state(
+            state_value=CareerChat.waiting_user,
+            data={"dialogue_texts": ["Текст"]}
+        )
+        first_done = asyncio.Event()
+        active = 0
+        max_active = 0
+
+        async def slow_indicator(**kwargs):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            for _ in range(3):
+                await asyncio.sleep(0)
+            active -= 1
+            return "OK"
+
+        async def first_click():
+            await career_controls_handler(callback, state)
+            first_done.set()
+
+        async def late_click():
+            await first_done.wait()
+            await career_controls_handler(callback, state)
+
+        with patch("app.cases.career_dialog.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.career_dialog.handler.with_analysis_indicator", side_effect=slow_indicator), \
+             patch("app.cases.career_dialog.handler.mark_case_completed", new_callable=AsyncMock), \
+             patch("app.cases.career_dialog.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.career_dialog.handler.disable_buttons_by_id", new_callable=AsyncMock):
+
+            await asyncio.gather(
+                first_click(),
+                career_controls_handler(callback, state),
+                late_click(),
+            )
+
+            assert max_active == 1
+            assert 12345 not in career_handler._REVIEW_LOCKS
+            assert 12345 not in career_handler._REVIEW_LOCK_USERS
+
+    @pytest.mark.asyncio
+    async def test_review_invitation_survives_stats_error(self):
+        """Тест: ошибка статистики не мешает приглашению к опросу"""
+        callback = create_mock_callback(data="case:career_dialog:review")
+        state = create_mock_state(
+            state_value=CareerChat.waiting_user,
+            data={"dialogue_texts": ["Текст"]}
+        )
+        
+        with patch("app.cases.career_dialog.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.career_dialog.handler.with_analysis_indicator", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.career_dialog.handler.mark_case_completed", new_callable=AsyncMock, side_effect=Exception("DB error")), \
+             patch("app.cases.career_dialog.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=True), \
+             patch("app.cases.career_dialog.handler.send_survey_invitation", new_callable=AsyncMock) as mock_survey, \
+             patch("app.cases.career_dialog.handler.disable_buttons_by_id", new_callable=AsyncMock):
+            
+            await career_controls_handler(callback, state)
+            
+            mock_survey.assert_called_once()
+
 
 class TestPeerControlsHandlers:
     """Тесты для кнопок управления fb_peer"""
@@ -467,13 +814,13 @@ class TestEmployeeControlsHandlers:
         state = create_mock_state()
         
         with patch("app.cases.fb_employee.handler.clear_case_conversations", new_callable=AsyncMock) as mock_clear:
-            await employee_controls_handler(callback, state)
+            await employee_restart_handler(callback, state)
             
             mock_clear.assert_called_once_with(AIDemoConfig.CASE_ID, callback.from_user.id)
             state.set_state.assert_called_with(AIChat.waiting_user)
 
     @pytest.mark.asyncio
-    async def test_employee_review(self):
+    async def test_employee_review(self, employee_background_tasks):
         """Тест: получение анализа fb_employee"""
         callback = create_mock_callback(data="case:fb_employee:review")
         state = create_mock_state(
@@ -485,11 +832,140 @@ class TestEmployeeControlsHandlers:
              patch("app.cases.fb_employee.handler.with_analysis_indicator", new_callable=AsyncMock, return_value="OK"), \
              patch("app.cases.fb_employee.handler.mark_case_completed", new_callable=AsyncMock), \
              patch("app.cases.fb_employee.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
-             patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock):
+             patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler._AFTER_REVIEW_DELAY_SEC", 0):
             
-            await employee_controls_handler(callback, state)
+            await employee_review_handler(callback, state)
+            state.get_state.return_value = AIChat.review_complete
+            await asyncio.gather(*employee_background_tasks)
             
             callback.message.answer.assert_called()
+            assert callback.message.answer.call_args.args[0] == AIDemoConfig.AFTER_REVIEW_MESSAGE
+            assert callback.message.answer.call_args.kwargs["reply_markup"] is employee_handler._AFTER_REVIEW_MARKUP
+            state.set_state.assert_called_with(AIChat.review_complete)
+
+    @pytest.mark.asyncio
+    async def test_employee_review_does_not_wait_for_after_review_pause(self, employee_background_tasks):
+        """Тест: пауза перед инлайн-опциями не удерживает обработчик"""
+        callback = create_mock_callback(data="case:fb_employee:review")
+        state = create_mock_state(
+            state_value=AIChat.waiting_user,
+            data={"dialogue_entries": [{"role": "Руководитель", "text": "Текст"}]}
+        )
+        callback.message.answer = AsyncMock(return_value=MagicMock(message_id=77))
+        
+        with patch("app.cases.fb_employee.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.fb_employee.handler.with_analysis_indicator", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.fb_employee.handler.mark_case_completed", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler._AFTER_REVIEW_DELAY_SEC", 0.05):
+            
+            await employee_review_handler(callback, state)
+            
+            # Рецензия уже отправлена, инлайн-опции — ещё нет
+            callback.message.answer.assert_called_once()
+            state.set_state.assert_called_with(AIChat.review_complete)
+            
+            state.get_state.return_value = AIChat.review_complete
+            await asyncio.gather(*employee_background_tasks)
+            
+            assert callback.message.answer.call_count == 2
+            state.update_data.assert_called_with({"active_inline_message_id": 77})
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("elapsed", [9.95, 20.0])
+    async def test_employee_after_review_pause_counts_from_review_send(self, elapsed):
+        """Тест: пауза перед инлайн-опциями уменьшается на время, уже прошедшее с отправки рецензии"""
+        message = MagicMock()
+        message.answer = AsyncMock(return_value=MagicMock(message_id=77))
+        state = create_mock_state(state_value=AIChat.review_complete)
+        
+        with patch("app.cases.fb_employee.handler._AFTER_REVIEW_DELAY_SEC", 10.0):
+            # Полная пауза заняла бы 10 с — таймаут сработал бы
+            await asyncio.wait_for(
+                employee_handler._send_after_review_followup(message, state, time.monotonic() - elapsed, None),
+                timeout=1,
+            )
+        
+        message.answer.assert_called_once()
+        state.update_data.assert_called_once_with({"active_inline_message_id": 77})
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("state_value, data", [
+        (AIChat.waiting_user, {"active_inline_message_id": None}),
+        (AIChat.review_complete, {"active_inline_message_id": 88}),
+    ])
+    async def test_employee_after_review_skipped_after_restart(self, state_value, data):
+        """Тест: если за паузу диалог перезапустили, инлайн-опции после рецензии не отправляются"""
+        message = MagicMock()
+        message.answer = AsyncMock(return_value=MagicMock(message_id=77))
+        state = create_mock_state(state_value=state_value, data=data)
+        
+        with patch("app.cases.fb_employee.handler._AFTER_REVIEW_DELAY_SEC", 0):
+            await employee_handler._send_after_review_followup(message, state, time.monotonic(), 55)
+        
+        message.answer.assert_not_called()
+        state.update_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_employee_review_reads_state_data_once(self, employee_background_tasks):
+        """Тест: данные FSM читаются один раз, id активного сообщения берётся из них"""
+        callback = create_mock_callback(data="case:fb_employee:review")
+        state = create_mock_state(
+            state_value=AIChat.waiting_user,
+            data={"dialogue_entries": [], "active_inline_message_id": 55}
+        )
+        
+        with patch("app.cases.fb_employee.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.fb_employee.handler.with_analysis_indicator", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.fb_employee.handler.mark_case_completed", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock) as mock_disable, \
+             patch("app.cases.fb_employee.handler._AFTER_REVIEW_DELAY_SEC", 0):
+            
+            await employee_review_handler(callback, state)
+            # Обработчик читает данные FSM один раз; follow-up перечитывает их только для проверки перезапуска
+            state.get_data.assert_awaited_once()
+            state.get_state.return_value = AIChat.review_complete
+            await asyncio.gather(*employee_background_tasks)
+            
+            # Старое сообщение правится один раз: follow-up не отключает его повторно
+            mock_disable.assert_called_once_with(callback.bot, callback.message.chat.id, 55)
+
+    @pytest.mark.asyncio
+    async def test_employee_review_sends_while_disabling_buttons(self, employee_background_tasks):
+        """Тест: рецензия отправляется, не дожидаясь отключения старых кнопок"""
+        callback = create_mock_callback(data="case:fb_employee:review")
+        state = create_mock_state(
+            state_value=AIChat.waiting_user,
+            data={"dialogue_entries": [], "active_inline_message_id": 55}
+        )
+        review_sent = asyncio.Event()
+
+        async def answer(*args, **kwargs):
+            review_sent.set()
+            return MagicMock(message_id=77)
+
+        async def disable_after_send(*args):
+            # Без параллельной отправки рецензия не ушла бы — ожидание завершится таймаутом
+            await asyncio.wait_for(review_sent.wait(), timeout=1)
+
+        callback.message.answer = AsyncMock(side_effect=answer)
+        
+        with patch("app.cases.fb_employee.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.fb_employee.handler.with_analysis_indicator", new_callable=AsyncMock, return_value="OK"), \
+             patch("app.cases.fb_employee.handler.mark_case_completed", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.fb_employee.handler.disable_buttons_by_id", side_effect=disable_after_send), \
+             patch("app.cases.fb_employee.handler._AFTER_REVIEW_DELAY_SEC", 0):
+            
+            await employee_review_handler(callback, state)
+            state.get_state.return_value = AIChat.review_complete
+            await asyncio.gather(*employee_background_tasks)
+            
+            assert callback.message.answer.call_count == 2
+            state.set_state.assert_called_with(AIChat.review_complete)
 
 
 class TestEdgeCases:
@@ -527,7 +1003,7 @@ class TestEdgeCases:
         callback = create_mock_callback(data="case:career_dialog:review")
         state = create_mock_state(
             state_value=CareerChat.waiting_user,
-            data={"dialogue_entries": []}
+            data={"dialogue_texts": []}
         )
         
         with patch("app.cases.career_dialog.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="Диалог слишком короткий"), \
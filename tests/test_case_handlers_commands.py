@@ -98,8 +98,8 @@ class TestCareerStartCommand:
             state.update_data.assert_called_once()
             call_kwargs = state.update_data.call_args[1]
             assert call_kwargs["turn_count"] == 0
-            assert call_kwargs["dialogue_entries"] == []
-            assert isinstance(call_kwargs["total_components_achieved"], set)
+            assert call_kwargs["dialogue_texts"] == []
+            assert call_kwargs["components_bitmap"] == 0
             
             # Проверяем что отправлено стартовое сообщение
             message.answer.assert_called_once()
@@ -161,6 +161,19 @@ class TestAIDemoStartCommand:
             # Проверяем что отправлено как минимум 2 сообщения (стартовое + про аудио)
             assert message.answer.call_count == 2
 
+    @pytest.mark.asyncio
+    async def test_aidemo_start_initializes_provd_bitmap(self):
+        """Тест: компоненты ПРОВД инициализируются пустой битовой маской"""
+        message = create_mock_message()
+        state = create_mock_state()
+
+        with patch("app.cases.fb_employee.handler.clear_case_conversations", new_callable=AsyncMock):
+            await ai_demo_start(message, state)
+
+            call_kwargs = state.update_data.call_args[1]
+            assert call_kwargs["provd_bitmap"] == 0
+            assert "total_provd_achieved" not in call_kwargs
+
 
 class TestCareerStopCommand:
     """Тесты для команды /career_stop (career_stop)"""
@@ -285,8 +298,7 @@ class TestCareerDialogDescription:
             
             # Проверяем что ID сохранен
             state.update_data.assert_called_once()
-            call_kwargs = state.update_data.call_args[1]
-            assert call_kwargs.get("active_inline_message_id") == 123
+            assert state.update_data.call_args.args[0] == {"active_inline_message_id": 123}
 
     @pytest.mark.asyncio
     async def test_description_handles_missing_message(self):
@@ -13,8 +13,10 @@
 - extract_dialogue_text
 """
 
+import asyncio
 import pytest
 import json
+from unittest.mock import patch
 
 from app.cases.career_dialog.handler import (
     format_career_response,
@@ -31,6 +33,7 @@ from app.cases.fb_peer.handler import (
 from app.cases.fb_employee.handler import (
     format_provd_response as format_provd_employee,
     parse_reviewer_response as parse_reviewer_employee,
+    parse_reviewer_response_async as parse_reviewer_employee_async,
     format_review_response as format_review_employee,
     extract_dialogue_text as extract_dialogue_employee,
 )
@@ -275,6 +278,32 @@ class TestParseReviewerResponse:
         assert len(result["goodPoints"]) == 10
         assert len(result["improvementPoints"]) == 5
 
+    @pytest.mark.asyncio
+    async def test_parse_async_large_review_in_thread(self):
+        """Тест: большой ответ рецензента fb_employee разбирается через asyncio.to_thread"""
+        response = json.dumps({
+            "overall": "Большой отзыв " + "x" * 20_000,
+            "goodPoints": ["Эмпатия"],
+            "improvementPoints": []
+        })
+
+        with patch("asyncio.to_thread", wraps=asyncio.to_thread) as mock_to_thread:
+            result = await parse_reviewer_employee_async(response)
+
+            mock_to_thread.assert_called_once()
+        assert result["goodPoints"] == ["Эмпатия"]
+
+    @pytest.mark.asyncio
+    async def test_parse_async_small_review_inline(self):
+        """Тест: короткий ответ рецензента разбирается без отдельного потока"""
+        response = json.dumps({"overall": "Коротко", "goodPoints": [], "improvementPoints": []})
+
+        with patch("asyncio.to_thread") as mock_to_thread:
+            result = await parse_reviewer_employee_async(response)
+
+            mock_to_thread.assert_not_called()
+        assert result["overall"] == "Коротко"
+
 
 class TestFormatReviewResponse:
     """Тесты для функции format_review_response"""
@@ -364,12 +393,62 @@ class TestFormatReviewResponse:
         assert "1. Раз" in result
         assert "2. Два" in result
 
+    def test_career_review_escapes_html(self):
+        """Тест: текст рецензента экранируется для parse_mode=HTML"""
+        parsed = {
+            "overall": "Оценка <5 & *не* ниже 3",
+            "goodPoints": ["<b>Вопросы</b>"],
+            "improvementPoints": ["_Паузы_"]
+        }
+
+        result = format_review_career(parsed)
+
+        assert "Оценка &lt;5 &amp; *не* ниже 3" in result
+        assert "1. &lt;b&gt;Вопросы&lt;/b&gt;" in result
+        assert "1. _Паузы_" in result
+        assert "<b>АНАЛИЗ КАРЬЕРНОГО ДИАЛОГА</b>" in result
+
+
+class TestExtractDialogueTextCareer:
+    """Тесты для extract_dialogue_text карьерного диалога (роль по чётности индекса)"""
+
+    def test_extract_alternates_roles(self):
+        """Тест: роли чередуются начиная с руководителя"""
+        result = extract_dialogue_career(["Привет, как дела?", "Хорошо, спасибо.", "Давай обсудим твои цели."])
+
+        assert result == (
+            "Руководитель: Привет, как дела?\n\n"
+            "Максим: Хорошо, спасибо.\n\n"
+            "Руководитель: Давай обсудим твои цели."
+        )
+
+    def test_extract_empty_dialogue(self):
+        """Тест: пустой диалог"""
+        assert extract_dialogue_career([]) == ""
+
+    def test_extract_skips_empty_texts_keeping_roles(self):
+        """Тест: пустые реплики пропускаются, роли остальных не сдвигаются"""
+        result = extract_dialogue_career(["Первая реплика", "", "Вторая реплика", "Ответ"])
+
+        assert result == (
+            "Руководитель: Первая реплика\n\n"
+            "Руководитель: Вторая реплика\n\n"
+            "Максим: Ответ"
+        )
+
+    def test_extract_long_dialogue(self):
+        """Тест: длинный диалог"""
+        result = extract_dialogue_career([f"Реплика номер {i}" for i in range(20)])
+
+        assert "Руководитель: Реплика номер 0" in result
+        assert "Максим: Реплика номер 19" in result
+        assert result.count("\n\n") == 19
+
 
 class TestExtractDialogueText:
     """Тесты для функции extract_dialogue_text"""
 
     ALL_EXTRACTORS = [
-        pytest.param(extract_dialogue_career, id="career_dialog"),
         pytest.param(extract_dialogue_peer, id="fb_peer"),
         pytest.param(extract_dialogue_employee, id="fb_employee"),
     ]
@@ -478,6 +557,16 @@ class TestEdgeCases:
         # Должно корректно обработать отсутствующие флаги
         assert "Ответ" in result
 
+    def test_parse_career_skips_json_without_required_key(self):
+        """Тест: JSON без обязательного поля не разбирается вовсе"""
+        response = '{"comment": "нет нужных полей"}'
+        
+        with patch("app.cases.career_dialog.handler.json_loads") as mock_loads:
+            result = parse_reviewer_career(response)
+        
+        mock_loads.assert_not_called()
+        assert result["overall"] == response
+
     def test_format_provd_with_none_values(self):
         """Тест: форматирование с None значениями"""
         parsed = {
@@ -506,15 +595,11 @@ class TestEdgeCases:
         # Должен обработать некорректную структуру
         assert result["overall"] == "Анализ"
 
-    def test_extract_dialogue_with_missing_keys(self):
-        """Тест: извлечение диалога с отсутствующими ключами"""
-        entries = [
-            {"role": "Руководитель"},  # Нет text
-            {"text": "Нет роли"},  # Нет role
-            {"role": "Максим", "text": "Нормальная запись"},
-        ]
+    def test_extract_dialogue_with_missing_values(self):
+        """Тест: извлечение диалога с пустыми репликами"""
+        texts = ["", "", "Нормальная запись"]
         
-        result = extract_dialogue_career(entries)
+        result = extract_dialogue_career(texts)
         
         # Только нормальная запись должна быть включена
         assert "Нормальная запись" in result
@@ -549,12 +634,9 @@ class TestCyrillicAndUnicode:
 
     def test_extract_dialogue_with_mixed_languages(self):
         """Тест: извлечение диалога со смешанными языками"""
-        entries = [
-            {"role": "Руководитель", "text": "Hello, как дела? 你好"},
-            {"role": "Максим", "text": "Хорошо, thanks! 谢谢"},
-        ]
+        texts = ["Hello, как дела? 你好", "Хорошо, thanks! 谢谢"]
         
-        result = extract_dialogue_career(entries)
+        result = extract_dialogue_career(texts)
         
         assert "Hello, как дела? 你好" in result
         assert "Хорошо, thanks! 谢谢" in result
@@ -13,6 +13,7 @@
 - _process_user_input (внутренняя функция)
 """
 
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from aiogram.fsm.context import FSMContext
@@ -72,10 +73,11 @@ def create_mock_state(data: dict = None) -> FSMContext:
     state.update_data = AsyncMock()
     state.get_data = AsyncMock(return_value=data or {
         "turn_count": 0,
-        "dialogue_entries": [],
+        "dialogue_texts": [],
         "total_components_achieved": set()
     })
     state.clear = AsyncMock()
+    state.storage = None
     return state
 
 
@@ -102,6 +104,77 @@ class TestCareerTurnText:
             # Проверяем что сообщение было обработано
             message.answer.assert_called()
 
+    @pytest.mark.asyncio
+    async def test_turn_accumulates_components_bitmap(self):
+        """Тест: достигнутые компоненты накапливаются в битовой маске"""
+        message = create_mock_message(text="Какой план на полгода?")
+        state = create_mock_state(data={
+            "turn_count": 1,
+            "dialogue_texts": [],
+            "components_bitmap": 0b00001,  # Aspirations
+        })
+        
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Давайте", "Aspirations": false, "Strengths": false, "Development": false, "Opportunities": false, "Plan": true}'
+        
+        with patch("app.cases.career_dialog.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value="Какой план на полгода?"), \
+             patch("app.cases.career_dialog.handler.with_typing_indicator", new_callable=AsyncMock, return_value=mock_ai_response):
+            
+            await career_turn(message, state, is_admin=False)
+            
+            call_kwargs = state.update_data.call_args[1]
+            assert call_kwargs["components_bitmap"] == 0b10001
+            assert call_kwargs["dialogue_texts"] == ["Какой план на полгода?", "Давайте"]
+            message.answer.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_turn_seeds_bitmap_from_legacy_components(self):
+        """Тест: компоненты, достигнутые до перехода на битовую маску, не теряются"""
+        message = create_mock_message(text="Какой план на полгода?")
+        state = create_mock_state(data={
+            "turn_count": 1,
+            "dialogue_texts": [],
+            "total_components_achieved": ["Aspirations", "Strengths"],
+        })
+        
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Давайте", "Aspirations": false, "Strengths": false, "Development": false, "Opportunities": false, "Plan": true}'
+        
+        with patch("app.cases.career_dialog.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value="Какой план на полгода?"), \
+             patch("app.cases.career_dialog.handler.with_typing_indicator", new_callable=AsyncMock, return_value=mock_ai_response):
+            
+            await career_turn(message, state, is_admin=False)
+            
+            call_kwargs = state.update_data.call_args[1]
+            assert call_kwargs["components_bitmap"] == 0b10011
+
+    @pytest.mark.asyncio
+    async def test_turn_continues_legacy_dialogue_entries(self):
+        """Тест: диалог, начатый до перехода на dialogue_texts, продолжается со старой историей"""
+        message = create_mock_message(text="Что дальше?")
+        state = create_mock_state(data={
+            "turn_count": 1,
+            "dialogue_entries": [
+                {"role": "Руководитель", "text": "Привет"},
+                {"role": "Максим", "text": "Здравствуйте"},
+            ],
+            "components_bitmap": 0,
+        })
+        
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Расту", "Aspirations": false, "Strengths": false, "Development": false, "Opportunities": false, "Plan": false}'
+        
+        with patch("app.cases.career_dialog.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value="Что дальше?"), \
+             patch("app.cases.career_dialog.handler.with_typing_indicator", new_callable=AsyncMock, return_value=mock_ai_response):
+            
+            await career_turn(message, state, is_admin=False)
+            
+            call_kwargs = state.update_data.call_args[1]
+            assert call_kwargs["dialogue_texts"] == ["Привет", "Здравствуйте", "Что дальше?", "Расту"]
+
     @pytest.mark.asyncio
     async def test_turn_restart_button(self):
         """Тест: обработка кнопки перезапуска"""
@@ -128,7 +201,7 @@ class TestCareerTurnText:
         
         with patch("app.cases.career_dialog.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value=KB_BACK_TO_MENU), \
              patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock), \
-             patch("app.keyboards.menu.get_main_menu_inline", new_callable=MagicMock(return_value=None)), \
+             patch("app.cases.career_dialog.handler.get_main_menu_inline", return_value=None), \
              patch("aiogram.types.ReplyKeyboardRemove", new_callable=MagicMock(return_value=None)):
             
             await career_turn(message, state, is_admin=False)
@@ -144,10 +217,7 @@ class TestCareerTurnText:
         from app.keyboards.menu import KB_CASE_REVIEW
         
         message = create_mock_message(text=KB_CASE_REVIEW)
-        state = create_mock_state(data={"dialogue_entries": [
-            {"role": "Руководитель", "text": "Текст"},
-            {"role": "Максим", "text": "Ответ"}
-        ]})
+        state = create_mock_state(data={"dialogue_texts": ["Текст", "Ответ"]})
         
         with patch("app.cases.career_dialog.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value=KB_CASE_REVIEW), \
              patch("app.cases.career_dialog.handler.perform_dialogue_review", new_callable=AsyncMock, return_value="Отличный диалог!"), \
@@ -158,8 +228,9 @@ class TestCareerTurnText:
             
             await career_turn(message, state, is_admin=False)
             
-            # Проверяем что анализ был получен
-            message.answer.assert_called()
+            # Рецензия и опции после неё приходят одним сообщением
+            message.answer.assert_called_once()
+            assert message.answer.call_args.args[0].startswith("Отличный диалог!\n\n")
 
     @pytest.mark.asyncio
     async def test_turn_updates_turn_count(self):
@@ -244,6 +315,32 @@ class TestCareerTurnVoice:
             # Проверяем что сообщение было обработано
             message.answer.assert_called()
 
+    @pytest.mark.asyncio
+    async def test_voice_uses_fresh_download_buffer(self):
+        """Тест: каждое голосовое скачивается в собственный буфер"""
+        message = create_mock_voice_message()
+        state = create_mock_state()
+        message.bot.get_file = AsyncMock(return_value=MagicMock())
+        message.bot.download = AsyncMock(side_effect=lambda file, buffer: buffer.write(b"OggS"))
+        seen = []
+
+        async def transcribe(buffer):
+            seen.append((buffer, buffer.getvalue()))
+            return ""
+
+        async def run_operation(**kwargs):
+            return await kwargs["async_operation"]()
+
+        with patch("app.cases.career_dialog.handler.transcribe_voice_ogg", side_effect=transcribe), \
+             patch("app.cases.career_dialog.handler.with_listening_indicator", side_effect=run_operation):
+            await career_turn_voice(message, state, is_admin=False)
+            await career_turn_voice(message, state, is_admin=False)
+
+        (first_buffer, first_data), (second_buffer, second_data) = seen
+        # Буфер не переиспользуется: зависший поток загрузки не может испортить следующее сообщение
+        assert first_buffer is not second_buffer
+        assert first_data == second_data == b"OggS"
+
     @pytest.mark.asyncio
     async def test_voice_empty_transcription(self):
         """Тест: пустая транскрибация"""
@@ -374,8 +471,8 @@ class TestDialogueCompletion:
         message = create_mock_message(text="Последний вопрос")
         state = create_mock_state(data={
             "turn_count": 2,
-            "dialogue_entries": [],
-            "total_components_achieved": {"Aspirations", "Strengths", "Development", "Opportunities", "Plan"}
+            "dialogue_texts": [],
+            "components_bitmap": 0b11111
         })
         
         mock_ai_response = MagicMock()
@@ -405,8 +502,8 @@ class TestDialogueCompletion:
         message = create_mock_message(text="Ход номер 6")
         state = create_mock_state(data={
             "turn_count": 5,
-            "dialogue_entries": [],
-            "total_components_achieved": set()
+            "dialogue_texts": [],
+            "components_bitmap": 0
         })
         
         mock_ai_response = MagicMock()
@@ -430,6 +527,73 @@ class TestDialogueCompletion:
             # Проверяем что диалог завершен
             message.answer.assert_called()
 
+    @pytest.mark.asyncio
+    async def test_completion_sends_two_combined_messages(self):
+        """Тест: ответ+завершение и рецензия+опции уходят двумя сообщениями без пауз"""
+        message = create_mock_message(text="Ход номер 6")
+        state = create_mock_state(data={
+            "turn_count": 5,
+            "dialogue_texts": [],
+            "components_bitmap": 0
+        })
+        
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Ответ", "Aspirations": false, "Strengths": false, "Development": false, "Opportunities": false, "Plan": false}'
+        
+        with patch("app.cases.career_dialog.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value="Ход номер 6"), \
+             patch("app.cases.career_dialog.handler.with_typing_indicator", new_callable=AsyncMock, return_value=mock_ai_response), \
+             patch("app.cases.career_dialog.handler.with_analysis_indicator", new_callable=AsyncMock, return_value="Рецензия"), \
+             patch("app.cases.career_dialog.handler.mark_case_out_of_moves", new_callable=AsyncMock), \
+             patch("app.cases.career_dialog.handler.mark_case_auto_finished", new_callable=AsyncMock), \
+             patch("app.cases.career_dialog.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.career_dialog.handler.disable_buttons_by_id", new_callable=AsyncMock), \
+             patch("app.cases.career_dialog.handler.get_case_after_review_inline", return_value=None):
+            
+            await career_turn(message, state, is_admin=False)
+            
+            assert message.answer.call_count == 2
+            first_text = message.answer.call_args_list[0][0][0]
+            second_text = message.answer.call_args_list[1][0][0]
+            assert "Ответ" in first_text
+            assert CareerDialogConfig.get_completion_max_turns_message() in first_text
+            assert second_text.startswith("Рецензия")
+            assert CareerDialogConfig.AFTER_REVIEW_MESSAGE in second_text
+
+    @pytest.mark.asyncio
+    async def test_completion_splits_long_review(self):
+        """Тест: слишком длинная рецензия уходит отдельно, кнопки остаются на сообщении с опциями"""
+        from app.cases.career_dialog import handler as career_handler
+
+        message = create_mock_message(text="Ход номер 6")
+        state = create_mock_state(data={
+            "turn_count": 5,
+            "dialogue_texts": [],
+            "components_bitmap": 0
+        })
+        long_review = "Р" * 4090
+        
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Ответ", "Aspirations": false, "Strengths": false, "Development": false, "Opportunities": false, "Plan": false}'
+        
+        with patch("app.cases.career_dialog.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value="Ход номер 6"), \
+             patch("app.cases.career_dialog.handler.with_typing_indicator", new_callable=AsyncMock, return_value=mock_ai_response), \
+             patch("app.cases.career_dialog.handler.with_analysis_indicator", new_callable=AsyncMock, return_value=long_review), \
+             patch("app.cases.career_dialog.handler.mark_case_out_of_moves", new_callable=AsyncMock), \
+             patch("app.cases.career_dialog.handler.mark_case_auto_finished", new_callable=AsyncMock), \
+             patch("app.cases.career_dialog.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.career_dialog.handler.disable_buttons_by_id", new_callable=AsyncMock):
+            
+            await career_turn(message, state, is_admin=False)
+            
+            assert message.answer.call_count == 3
+            review_call, options_call = message.answer.call_args_list[1:]
+            assert review_call.args[0] == long_review
+            assert "reply_markup" not in review_call.kwargs
+            assert options_call.args[0] == CareerDialogConfig.AFTER_REVIEW_MESSAGE
+            assert options_call.kwargs["reply_markup"] is career_handler._AFTER_REVIEW_GENERIC_MARKUP
+
 
 class TestEdgeCases:
     """Тесты граничных случаев"""
@@ -575,6 +739,124 @@ class TestFBEmployeeTurnText:
             
             message.answer.assert_called()
 
+    @pytest.mark.asyncio
+    async def test_turns_in_same_chat_are_serialized(self):
+        """Тест: два сообщения одного чата обрабатываются по очереди"""
+        import app.cases.fb_employee.handler as employee_handler
+
+        active = 0
+        max_active = 0
+
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Ответ", "Behavior": false, "Result": false, "Emotion": false, "Question": false, "Agreement": false}'
+
+        async def slow_ai(**kwargs):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0)
+            active -= 1
+            return mock_ai_response
+
+        first = create_mock_message(text="Первый")
+        second = create_mock_message(text="Второй")
+        state = create_mock_state(data={"turn_count": 0, "dialogue_entries": [], "provd_bitmap": 0})
+        state.get_state = AsyncMock(return_value=AIChat.waiting_user)
+
+        with patch("app.cases.fb_employee.handler.validator.validate_and_process_text", new_callable=AsyncMock, side_effect=["Первый", "Второй"]), \
+             patch("app.cases.fb_employee.handler.with_typing_indicator", side_effect=slow_ai):
+
+            await asyncio.gather(
+                ai_demo_turn(first, state, is_admin=False),
+                ai_demo_turn(second, state, is_admin=False),
+            )
+
+            assert max_active == 1
+            assert state.update_data.call_count == 2
+            assert first.chat.id not in employee_handler._TURN_LOCKS
+
+    @pytest.mark.asyncio
+    async def test_late_turn_waits_for_queued_turn(self):
+        """Тест: сообщение, пришедшее после первого хода, ждёт уже стоящий в очереди ход"""
+        import app.cases.fb_employee.handler as employee_handler
+
+        active = 0
+        max_active = 0
+        first_done = asyncio.Event()
+
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Ответ", "Behavior": false, "Result": false, "Emotion": false, "Question": false, "Agreement": false}'
+
+        async def slow_ai(**kwargs):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            for _ in range(3):
+                await asyncio.sleep(0)
+            active -= 1
+            return mock_ai_response
+
+        messages = [create_mock_message(text=text) for text in ("Первый", "Второй", "Третий")]
+        state = create_mock_state(data={"turn_count": 0, "dialogue_entries": [], "provd_bitmap": 0})
+        state.get_state = AsyncMock(return_value=AIChat.waiting_user)
+
+        async def first_turn():
+            await ai_demo_turn(messages[0], state, is_admin=False)
+            first_done.set()
+
+        async def third_turn():
+            await first_done.wait()
+            await ai_demo_turn(messages[2], state, is_admin=False)
+
+        with patch("app.cases.fb_employee.handler.validator.validate_and_process_text", new_callable=AsyncMock, side_effect=["Первый", "Второй", "Третий"]), \
+             patch("app.cases.fb_employee.handler.with_typing_indicator", side_effect=slow_ai):
+
+            await asyncio.gather(
+                first_turn(),
+                ai_demo_turn(messages[1], state, is_admin=False),
+                third_turn(),
+            )
+
+            assert max_active == 1
+            assert state.update_data.call_count == 3
+            assert messages[0].chat.id not in employee_handler._TURN_LOCKS
+            assert messages[0].chat.id not in employee_handler._TURN_LOCK_USERS
+
+    @pytest.mark.asyncio
+    async def test_turn_appends_entries_in_postgres_storage(self):
+        """Тест: в Postgres дописываются только реплики текущего хода"""
+        from app.storage import PostgresFSMStorage
+
+        message = create_mock_message(text="Вопрос")
+        state = create_mock_state(data={
+            "turn_count": 1,
+            "dialogue_entries": [{"role": "Руководитель", "text": "Старое"}, {"role": "Евгений", "text": "Ответ"}],
+            "provd_bitmap": 0b100
+        })
+        state.get_state = AsyncMock(return_value=AIChat.waiting_user)
+        state.storage = MagicMock(spec=PostgresFSMStorage)
+        state.storage.append_data = AsyncMock()
+        state.key = MagicMock()
+
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Новый ответ", "Behavior": true, "Result": false, "Emotion": false, "Question": false, "Agreement": false}'
+
+        with patch("app.cases.fb_employee.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value="Вопрос"), \
+             patch("app.cases.fb_employee.handler.with_typing_indicator", new_callable=AsyncMock, return_value=mock_ai_response):
+
+            await ai_demo_turn(message, state, is_admin=False)
+
+            state.update_data.assert_not_called()
+            state.storage.append_data.assert_called_once_with(
+                state.key,
+                "dialogue_entries",
+                [{"role": "Руководитель", "text": "Вопрос"}, {"role": "Евгений", "text": "Новый ответ"}],
+                {"turn_count": 2, "provd_bitmap": 0b101},
+            )
+
     @pytest.mark.asyncio
     async def test_turn_max_turns_reached(self):
         """Тест: достижение максимального количества ходов"""
@@ -600,13 +882,40 @@ class TestFBEmployeeTurnText:
              patch("app.cases.fb_employee.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
              patch("app.cases.fb_employee.handler.send_survey_invitation", new_callable=AsyncMock), \
              patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock), \
-             patch("app.cases.fb_employee.handler.get_case_after_review_inline", new_callable=MagicMock(return_value=None)):
+             patch("app.cases.fb_employee.handler.get_case_after_review_inline", return_value=None):
             
             await ai_demo_turn(message, state, is_admin=False)
             
-            message.answer.assert_called()
+            # Ответ + завершение и рецензия + опции — два сообщения без пауз
+            assert message.answer.call_count == 2
+            first_text = message.answer.call_args_list[0].args[0]
+            second_text = message.answer.call_args_list[1].args[0]
+            assert first_text.endswith(AIDemoConfig.get_completion_max_turns_message())
+            assert second_text == f"Завершен\n\n{AIDemoConfig.AFTER_REVIEW_MESSAGE}"
 
 
+    @pytest.mark.asyncio
+    async def test_turn_seeds_bitmap_from_legacy_provd(self):
+        """Тест: ПРОВД, достигнутые до перехода на битовую маску, не теряются"""
+        message = create_mock_message(text="Вопрос")
+        state = create_mock_state(data={
+            "turn_count": 1,
+            "dialogue_entries": [],
+            "total_provd_achieved": ["Result", "Emotion"],
+        })
+        state.get_state = AsyncMock(return_value=AIChat.waiting_user)
+
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Ответ", "Behavior": true, "Result": false, "Emotion": false, "Question": false, "Agreement": false}'
+
+        with patch("app.cases.fb_employee.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value="Вопрос"), \
+             patch("app.cases.fb_employee.handler.with_typing_indicator", new_callable=AsyncMock, return_value=mock_ai_response):
+
+            await ai_demo_turn(message, state, is_admin=False)
+
+            assert state.update_data.call_args.kwargs["provd_bitmap"] == 0b111
+
 class TestFBEmployeeTurnVoice:
     """Тесты для ai_demo_turn_voice (голосовые сообщения)"""
 
@@ -738,6 +1047,81 @@ class TestFBEmployeeDialogueCompletion:
             
             message.answer.assert_called()
 
+    @pytest.mark.asyncio
+    async def test_turn_completion_keeps_buttons_on_broken_review_markdown(self):
+        """Тест: рецензия с битой Markdown-разметкой уходит без разметки, кнопки после неё не теряются"""
+        from aiogram.exceptions import TelegramBadRequest
+        import app.cases.fb_employee.handler as employee_handler
+
+        broken_review = "Рецензия с непарной *звёздочкой"
+        message = create_mock_message(text="Последний вопрос")
+        state = create_mock_state(data={"turn_count": 5, "dialogue_entries": []})
+        state.get_state = AsyncMock(return_value=AIChat.waiting_user)
+
+        async def answer(text, parse_mode=None, **kwargs):
+            if broken_review in text and parse_mode == "Markdown":
+                raise TelegramBadRequest(method=MagicMock(), message="can't parse entities")
+            return MagicMock(message_id=77)
+
+        message.answer = AsyncMock(side_effect=answer)
+
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Ответ", "Behavior": false, "Result": false, "Emotion": false, "Question": false, "Agreement": false}'
+
+        with patch("app.cases.fb_employee.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value="Последний вопрос"), \
+             patch("app.cases.fb_employee.handler.with_typing_indicator", new_callable=AsyncMock, return_value=mock_ai_response), \
+             patch("app.cases.fb_employee.handler.with_analysis_indicator", new_callable=AsyncMock, return_value=broken_review), \
+             patch("app.cases.fb_employee.handler.mark_case_out_of_moves", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.mark_case_auto_finished", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.acquire_rating_invite_lock", new_callable=AsyncMock, return_value=False), \
+             patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock):
+
+            await ai_demo_turn(message, state, is_admin=False)
+
+            plain_review, options = message.answer.call_args_list[-2:]
+            assert plain_review.args[0] == broken_review
+            assert plain_review.kwargs["parse_mode"] is None
+            assert options.args[0] == AIDemoConfig.AFTER_REVIEW_MESSAGE
+            assert options.kwargs["reply_markup"] is employee_handler._AFTER_REVIEW_GENERIC_MARKUP
+            state.set_state.assert_called_with(AIChat.review_complete)
+
+    @pytest.mark.asyncio
+    async def test_turn_completion_stats_run_alongside_review(self):
+        """Тест: статистика завершения пишется параллельно с рецензией, а не до неё"""
+        message = create_mock_message(text="Последний вопрос")
+        state = create_mock_state(data={"turn_count": 5, "dialogue_entries": []})
+        state.get_state = AsyncMock(return_value=AIChat.waiting_user)
+        
+        mock_ai_response = MagicMock()
+        mock_ai_response.success = True
+        mock_ai_response.content = '{"ReplyText": "Ответ", "Behavior": false, "Result": false, "Emotion": false, "Question": false, "Agreement": false}'
+        stats_started = asyncio.Event()
+
+        async def slow_stat(*args):
+            stats_started.set()
+            await asyncio.sleep(0)
+
+        async def review(*args, **kwargs):
+            # Рецензия дожидается старта записи статистики: при последовательных await был бы таймаут
+            await asyncio.wait_for(stats_started.wait(), timeout=1)
+            return "Завершен"
+        
+        with patch("app.cases.fb_employee.handler.validator.validate_and_process_text", new_callable=AsyncMock, return_value="Последний вопрос"), \
+             patch("app.cases.fb_employee.handler.send_dialogue_message", new_callable=AsyncMock, return_value=mock_ai_response), \
+             patch("app.cases.fb_employee.handler.with_typing_indicator", new_callable=AsyncMock, return_value=mock_ai_response), \
+             patch("app.cases.fb_employee.handler.with_analysis_indicator", side_effect=review), \
+             patch("app.cases.fb_employee.handler.mark_case_out_of_moves", side_effect=slow_stat) as mock_out, \
+             patch("app.cases.fb_employee.handler.mark_case_auto_finished", new_callable=AsyncMock) as mock_auto, \
+             patch("app.cases.fb_employee.handler.disable_buttons_by_id", new_callable=AsyncMock), \
+             patch("app.cases.fb_employee.handler.get_case_after_review_inline", return_value=None):
+            
+            await ai_demo_turn(message, state, is_admin=False)
+            
+            mock_out.assert_called_once_with(message.from_user.id, AIDemoConfig.CASE_ID)
+            mock_auto.assert_called_once_with(message.from_user.id, AIDemoConfig.CASE_ID)
+            assert message.answer.call_args_list[1].args[0] == f"Завершен\n\n{AIDemoConfig.AFTER_REVIEW_MESSAGE}"
+
 
 class TestFBPeerErrorHandling:
     """Тесты обработки ошибок для fb_peer"""
@@ -822,7 +1206,7 @@ class TestErrorHandlingScenarios:
         from app.cases.fb_employee.handler import perform_dialogue_review
         
         with patch("app.cases.fb_employee.handler.extract_dialogue_text", new_callable=MagicMock, return_value=""):
-            result = await perform_dialogue_review([], "12345:openai")
+            result = await perform_dialogue_review([], 12345)
             
             # Должен вернуть сообщение об ошибке
             assert "короткий" in result.lower() or "пуст" in result.lower()
@@ -839,7 +1223,7 @@ class TestErrorHandlingScenarios:
                  content="", success=False, error="Network error"
              )):
             
-            result = await perform_dialogue_review([], "12345:openai")
+            result = await perform_dialogue_review([], 12345)
             
             # Должен вернуть сообщение об ошибке
             assert "error" in result.lower() or "ошибка" in result.lower()
@@ -7,6 +7,8 @@
 - app/cases/fb_employee/handler.py::perform_dialogue_review
 """
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 
@@ -19,6 +21,8 @@ from app.cases.fb_peer.handler import (
 from app.cases.fb_employee.handler import (
     perform_dialogue_review as perform_review_employee,
 )
+import app.cases.career_dialog.handler as career_handler
+import app.cases.fb_employee.handler as employee_handler
 from app.cases.career_dialog.config import CareerDialogConfig
 from app.cases.fb_peer.config import FBPeerConfig
 from app.cases.fb_employee.config import AIDemoConfig
@@ -30,13 +34,8 @@ class TestPerformDialogueReviewCareer:
     @pytest.mark.asyncio
     async def test_successful_review(self):
         """Тест: успешное рецензирование диалога"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "Привет, Максим. Давай обсудим твои цели."},
-            {"role": "Максим", "text": "Здравствуйте. Хорошо."},
-            {"role": "Руководитель", "text": "Какие у тебя карьерные планы?"},
-            {"role": "Максим", "text": "Хочу стать техническим экспертом."},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["Привет, Максим. Давай обсудим твои цели.", "Здравствуйте. Хорошо.", "Какие у тебя карьерные планы?", "Хочу стать техническим экспертом."]
+        user_id = 12345
         
         # Мокаем AI ответ
         mock_response = MagicMock()
@@ -46,7 +45,7 @@ class TestPerformDialogueReviewCareer:
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock) as mock_clear, \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response) as mock_send:
             
-            result = await perform_review_career(dialogue_entries, session_id)
+            result = await perform_review_career(texts, user_id)
             
             # Проверяем что AI был вызван
             mock_send.assert_called_once()
@@ -59,10 +58,10 @@ class TestPerformDialogueReviewCareer:
     @pytest.mark.asyncio
     async def test_review_with_empty_dialogue(self):
         """Тест: рецензирование пустого диалога"""
-        dialogue_entries = []
-        session_id = "12345:career_dialog"
+        texts = []
+        user_id = 12345
         
-        result = await perform_review_career(dialogue_entries, session_id)
+        result = await perform_review_career(texts, user_id)
         
         # Должен вернуть ошибку о коротком диалоге
         assert CareerDialogConfig.ERROR_SHORT_DIALOGUE in result
@@ -70,15 +69,12 @@ class TestPerformDialogueReviewCareer:
     @pytest.mark.asyncio
     async def test_review_with_whitespace_only_dialogue(self):
         """Тест: рецензирование диалога только с пробелами"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "   "},
-            {"role": "Максим", "text": "\n\n"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["   ", "\n\n"]
+        user_id = 12345
         
         # Мокаем extract_dialogue_text чтобы вернуть пустую строку
         with patch("app.cases.career_dialog.handler.extract_dialogue_text", return_value=""):
-            result = await perform_review_career(dialogue_entries, session_id)
+            result = await perform_review_career(texts, user_id)
         
         # Должен вернуть ошибку о коротком диалоге
         assert CareerDialogConfig.ERROR_SHORT_DIALOGUE in result
@@ -86,11 +82,8 @@ class TestPerformDialogueReviewCareer:
     @pytest.mark.asyncio
     async def test_review_with_ai_error(self):
         """Тест: ошибка AI при рецензировании"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "Привет"},
-            {"role": "Максим", "text": "Здравствуйте"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["Привет", "Здравствуйте"]
+        user_id = 12345
         
         # Мокаем AI ответ с ошибкой
         mock_response = MagicMock()
@@ -100,7 +93,7 @@ class TestPerformDialogueReviewCareer:
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock), \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response):
             
-            result = await perform_review_career(dialogue_entries, session_id)
+            result = await perform_review_career(texts, user_id)
             
             # Проверяем сообщение об ошибке
             assert "AI_Error" in result or "Connection timeout" in result
@@ -108,17 +101,14 @@ class TestPerformDialogueReviewCareer:
     @pytest.mark.asyncio
     async def test_review_with_exception(self):
         """Тест: исключение во время рецензирования"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "Текст"},
-            {"role": "Максим", "text": "Ответ"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["Текст", "Ответ"]
+        user_id = 12345
         
         # Мокаем исключение
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock), \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, side_effect=ValueError("Test error")):
             
-            result = await perform_review_career(dialogue_entries, session_id)
+            result = await perform_review_career(texts, user_id)
             
             # Проверяем что ошибка обработана корректно
             assert "ValueError" in result or "Test error" in result
@@ -126,11 +116,8 @@ class TestPerformDialogueReviewCareer:
     @pytest.mark.asyncio
     async def test_review_with_malformed_ai_response(self):
         """Тест: некорректный JSON от AI"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "Вопрос"},
-            {"role": "Максим", "text": "Ответ"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["Вопрос", "Ответ"]
+        user_id = 12345
         
         # Мокаем AI ответ с некорректным JSON
         mock_response = MagicMock()
@@ -140,7 +127,7 @@ class TestPerformDialogueReviewCareer:
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock), \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response):
             
-            result = await perform_review_career(dialogue_entries, session_id)
+            result = await perform_review_career(texts, user_id)
             
             # Должен обработать fallback и вернуть какой-то результат
             assert len(result) > 0
@@ -148,11 +135,8 @@ class TestPerformDialogueReviewCareer:
     @pytest.mark.asyncio
     async def test_review_uses_correct_case_id(self):
         """Тест: проверка использования правильного case_id"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "Диалог"},
-            {"role": "Максим", "text": "Ответ"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["Диалог", "Ответ"]
+        user_id = 12345
         
         mock_response = MagicMock()
         mock_response.success = True
@@ -161,7 +145,7 @@ class TestPerformDialogueReviewCareer:
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock) as mock_clear, \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response) as mock_send:
             
-            await perform_review_career(dialogue_entries, session_id)
+            await perform_review_career(texts, user_id)
             
             # Проверяем что используется правильный case_id
             args, kwargs = mock_send.call_args
@@ -170,11 +154,8 @@ class TestPerformDialogueReviewCareer:
     @pytest.mark.asyncio
     async def test_review_creates_separate_reviewer_session(self):
         """Тест: создание отдельной сессии для рецензента"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "Текст"},
-            {"role": "Максим", "text": "Ответ"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["Текст", "Ответ"]
+        user_id = 12345
         
         mock_response = MagicMock()
         mock_response.success = True
@@ -183,13 +164,13 @@ class TestPerformDialogueReviewCareer:
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock) as mock_clear, \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response) as mock_send:
             
-            await perform_review_career(dialogue_entries, session_id)
+            await perform_review_career(texts, user_id)
             
             # Проверяем что рецензент использует отдельный user_id
             args, kwargs = mock_send.call_args
             reviewer_user_id = kwargs.get("user_id")
-            # Рецензент должен иметь ID = оригинальный ID + 999999
-            assert reviewer_user_id == 12345 + 999999
+            # Рецензент должен иметь ID = оригинальный ID + смещение
+            assert reviewer_user_id == 12345 + career_handler.REVIEWER_USER_ID_OFFSET
 
 
 class TestPerformDialogueReviewPeer:
@@ -250,6 +231,55 @@ class TestPerformDialogueReviewPeer:
 class TestPerformDialogueReviewEmployee:
     """Тесты для perform_dialogue_review (fb_employee)"""
 
+    @pytest.fixture(autouse=True)
+    def isolate_module_state(self, monkeypatch):
+        """Свои кэш очищенных сессий и набор фоновых задач на каждый тест.
+
+        Наборы модульные: задачи прошлых тестов привязаны к уже закрытым циклам событий.
+        """
+        monkeypatch.setattr(employee_handler, "_CLEAN_REVIEWER_SESSIONS", set())
+        monkeypatch.setattr(employee_handler, "_BACKGROUND_TASKS", set())
+
+    @staticmethod
+    async def _drain_background():
+        await asyncio.gather(*employee_handler._BACKGROUND_TASKS, return_exceptions=True)
+
+    @pytest.mark.asyncio
+    async def test_review_resets_reviewer_session_after_use(self):
+        """Тест: первая рецензия чистит сессию до запроса, после — в фоне"""
+        mock_response = MagicMock()
+        mock_response.success = True
+        mock_response.content = '{"overall": "Ок", "goodPoints": [], "improvementPoints": []}'
+        entries = [{"role": "Руководитель", "text": "Привет"}]
+
+        with patch("app.cases.fb_employee.handler.clear_case_conversations", new_callable=AsyncMock) as mock_clear, \
+             patch("app.cases.fb_employee.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response):
+
+            await perform_review_employee(entries, 11111)
+            await self._drain_background()
+
+            assert mock_clear.call_count == 2
+            mock_clear.assert_called_with(AIDemoConfig.CASE_ID, 11111 + employee_handler.REVIEWER_USER_ID_OFFSET)
+            assert 11111 + employee_handler.REVIEWER_USER_ID_OFFSET in employee_handler._CLEAN_REVIEWER_SESSIONS
+
+    @pytest.mark.asyncio
+    async def test_review_skips_clear_for_clean_session(self):
+        """Тест: уже очищенная сессия рецензента не чистится перед запросом"""
+        employee_handler._CLEAN_REVIEWER_SESSIONS.add(11111 + employee_handler.REVIEWER_USER_ID_OFFSET)
+        mock_response = MagicMock()
+        mock_response.success = True
+        mock_response.content = '{"overall": "Ок", "goodPoints": [], "improvementPoints": []}'
+        entries = [{"role": "Руководитель", "text": "Привет"}]
+
+        with patch("app.cases.fb_employee.handler.clear_case_conversations", new_callable=AsyncMock) as mock_clear, \
+             patch("app.cases.fb_employee.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response):
+
+            await perform_review_employee(entries, 11111)
+
+            mock_clear.assert_not_called()
+            await self._drain_background()
+            mock_clear.assert_called_once_with(AIDemoConfig.CASE_ID, 11111 + employee_handler.REVIEWER_USER_ID_OFFSET)
+
     @pytest.mark.asyncio
     async def test_successful_review_employee(self):
         """Тест: успешное рецензирование диалога с сотрудником"""
@@ -257,7 +287,7 @@ class TestPerformDialogueReviewEmployee:
             {"role": "Руководитель", "text": "Евгений, хочу дать тебе обратную связь."},
             {"role": "Евгений", "text": "Хорошо, я слушаю."},
         ]
-        session_id = "11111:fb_employee"
+        user_id = 11111
         
         mock_response = MagicMock()
         mock_response.success = True
@@ -266,7 +296,8 @@ class TestPerformDialogueReviewEmployee:
         with patch("app.cases.fb_employee.handler.clear_case_conversations", new_callable=AsyncMock), \
              patch("app.cases.fb_employee.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response):
             
-            result = await perform_review_employee(dialogue_entries, session_id)
+            result = await perform_review_employee(dialogue_entries, user_id)
+            await self._drain_background()
             
             assert "Эффективный диалог" in result
             assert "ПРОВД структура" in result
@@ -279,7 +310,7 @@ class TestPerformDialogueReviewEmployee:
             role = "Руководитель" if i % 2 == 0 else "Евгений"
             dialogue_entries.append({"role": role, "text": f"Реплика {i}"})
         
-        session_id = "11111:fb_employee"
+        user_id = 11111
         
         mock_response = MagicMock()
         mock_response.success = True
@@ -288,7 +319,8 @@ class TestPerformDialogueReviewEmployee:
         with patch("app.cases.fb_employee.handler.clear_case_conversations", new_callable=AsyncMock), \
              patch("app.cases.fb_employee.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response):
             
-            result = await perform_review_employee(dialogue_entries, session_id)
+            result = await perform_review_employee(dialogue_entries, user_id)
+            await self._drain_background()
             
             assert "Длинный диалог" in result
 
@@ -299,11 +331,8 @@ class TestReviewEdgeCases:
     @pytest.mark.asyncio
     async def test_review_with_special_characters_in_dialogue(self):
         """Тест: спецсимволы в диалоге"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": 'Текст с "кавычками" и \\слэшами\\'},
-            {"role": "Максим", "text": "Ответ с !@#$% символами"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ['Текст с "кавычками" и \\слэшами\\', "Ответ с !@#$% символами"]
+        user_id = 12345
         
         mock_response = MagicMock()
         mock_response.success = True
@@ -312,7 +341,7 @@ class TestReviewEdgeCases:
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock), \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response):
             
-            result = await perform_review_career(dialogue_entries, session_id)
+            result = await perform_review_career(texts, user_id)
             
             # Должен корректно обработать спецсимволы
             assert len(result) > 0
@@ -320,11 +349,8 @@ class TestReviewEdgeCases:
     @pytest.mark.asyncio
     async def test_review_with_cyrillic_and_emoji(self):
         """Тест: кириллица и эмодзи в диалоге"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "Отличная работа! 👍"},
-            {"role": "Максим", "text": "Спасибо! 😊"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["Отличная работа! 👍", "Спасибо! 😊"]
+        user_id = 12345
         
         mock_response = MagicMock()
         mock_response.success = True
@@ -333,18 +359,15 @@ class TestReviewEdgeCases:
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock), \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response):
             
-            result = await perform_review_career(dialogue_entries, session_id)
+            result = await perform_review_career(texts, user_id)
             
             assert "🎉" in result or "Позитивный диалог" in result
 
     @pytest.mark.asyncio
     async def test_review_with_none_content_in_response(self):
         """Тест: None в content ответа AI"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "Текст"},
-            {"role": "Максим", "text": "Ответ"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["Текст", "Ответ"]
+        user_id = 12345
         
         mock_response = MagicMock()
         mock_response.success = True
@@ -353,7 +376,7 @@ class TestReviewEdgeCases:
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock), \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response):
             
-            result = await perform_review_career(dialogue_entries, session_id)
+            result = await perform_review_career(texts, user_id)
             
             # Должен обработать None и вернуть какой-то результат
             assert len(result) > 0
@@ -362,11 +385,8 @@ class TestReviewEdgeCases:
     async def test_review_with_very_long_text(self):
         """Тест: очень длинный текст в диалоге"""
         long_text = "Очень длинный текст. " * 500
-        dialogue_entries = [
-            {"role": "Руководитель", "text": long_text},
-            {"role": "Максим", "text": "Короткий ответ"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = [long_text, "Короткий ответ"]
+        user_id = 12345
         
         mock_response = MagicMock()
         mock_response.success = True
@@ -375,7 +395,7 @@ class TestReviewEdgeCases:
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock), \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response):
             
-            result = await perform_review_career(dialogue_entries, session_id)
+            result = await perform_review_career(texts, user_id)
             
             assert "Длинный диалог" in result
 
@@ -386,11 +406,8 @@ class TestReviewLogging:
     @pytest.mark.asyncio
     async def test_review_logs_session_info(self):
         """Тест: логирование информации о сессии"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "Текст"},
-            {"role": "Максим", "text": "Ответ"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["Текст", "Ответ"]
+        user_id = 12345
         
         mock_response = MagicMock()
         mock_response.success = True
@@ -400,7 +417,7 @@ class TestReviewLogging:
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, return_value=mock_response), \
              patch("app.cases.career_dialog.handler.logger") as mock_logger:
             
-            await perform_review_career(dialogue_entries, session_id)
+            await perform_review_career(texts, user_id)
             
             # Проверяем что логирование было вызвано
             assert mock_logger.info.called or mock_logger.debug.called
@@ -408,17 +425,14 @@ class TestReviewLogging:
     @pytest.mark.asyncio
     async def test_review_logs_errors(self):
         """Тест: логирование ошибок"""
-        dialogue_entries = [
-            {"role": "Руководитель", "text": "Текст"},
-            {"role": "Максим", "text": "Ответ"},
-        ]
-        session_id = "12345:career_dialog"
+        texts = ["Текст", "Ответ"]
+        user_id = 12345
         
         with patch("app.cases.career_dialog.handler.clear_case_conversations", new_callable=AsyncMock), \
              patch("app.cases.career_dialog.handler.send_reviewer_message", new_callable=AsyncMock, side_effect=Exception("Test error")), \
              patch("app.cases.career_dialog.handler.logger") as mock_logger:
             
-            await perform_review_career(dialogue_entries, session_id)
+            await perform_review_career(texts, user_id)
             
             # Проверяем что ошибка была залогирована
             assert mock_logger.error.called
@@ -0,0 +1,78 @@
+"""
+Тесты для репозитория секций таблицы conversations.
+
+Тестируемый модуль:
+- app/repositories/conversations.py
+
+Тестируемые компоненты:
+- ensure_conversation_partitions функция
+"""
+
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+import app.repositories.conversations as conversations_repo
+from app.repositories.conversations import ensure_conversation_partitions
+
+
+class TestEnsureConversationPartitions:
+    """Тесты для функции ensure_conversation_partitions"""
+
+    @pytest.mark.asyncio
+    async def test_ensure_partitions_current_and_months_ahead(self):
+        """Тест: создаются секции на текущий месяц и несколько месяцев вперёд"""
+        with patch("app.repositories.conversations._connect") as mock_connect:
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = []
+            mock_connect.return_value = mock_conn
+
+            await ensure_conversation_partitions()
+
+            assert mock_conn.execute.call_count == conversations_repo._PARTITION_MONTHS_AHEAD + 1
+            assert conversations_repo._PARTITION_MONTHS_AHEAD > 1
+            queries = [c.args[0] for c in mock_conn.execute.call_args_list]
+            assert all("conversations_ensure_partition" in q for q in queries)
+            months = [c.args[1] for c in mock_conn.execute.call_args_list]
+            assert months == list(range(conversations_repo._PARTITION_MONTHS_AHEAD + 1))
+            mock_conn.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_ensure_partitions_for_months_in_default(self):
+        """Тест: месяцы, строки которых попали в DEFAULT, тоже получают секции"""
+        stray_month = datetime(2026, 8, 1, tzinfo=timezone.utc)
+        with patch("app.repositories.conversations._connect") as mock_connect:
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = [{"month": stray_month}]
+            mock_connect.return_value = mock_conn
+
+            await ensure_conversation_partitions()
+
+            assert "conversations_default" in mock_conn.fetch.call_args.args[0]
+            first_call = mock_conn.execute.call_args_list[0]
+            assert "conversations_ensure_partition" in first_call.args[0]
+            assert first_call.args[1] == stray_month
+            assert mock_conn.execute.call_count == conversations_repo._PARTITION_MONTHS_AHEAD + 2
+
+    @pytest.mark.asyncio
+    async def test_ensure_partitions_no_connection(self):
+        """Тест: без DATABASE_URL ничего не делаем"""
+        with patch("app.repositories.conversations._connect") as mock_connect:
+            mock_connect.return_value = None
+
+            result = await ensure_conversation_partitions()
+
+            assert result is None
+
+    @pytest.mark.asyncio
+    async def test_ensure_partitions_closes_connection_on_error(self):
+        """Тест: соединение закрывается даже при ошибке"""
+        with patch("app.repositories.conversations._connect") as mock_connect:
+            mock_conn = AsyncMock()
+            mock_conn.execute.side_effect = Exception("DB error")
+            mock_connect.return_value = mock_conn
+
+            with pytest.raises(Exception, match="DB error"):
+                await ensure_conversation_partitions()
+
+            mock_conn.close.assert_called_once()
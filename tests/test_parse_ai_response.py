@@ -251,7 +251,10 @@ class TestParseAIResponseInvalidJSON:
         # Массив не имеет ReplyText -> fallback
         assert result["ReplyText"] == response
 
-    @pytest.mark.parametrize("parser", ALL_PARSERS)
+    @pytest.mark.parametrize("parser", [
+        pytest.param(parse_fb_peer, id="fb_peer"),
+        pytest.param(parse_career_dialog, id="career_dialog"),
+    ])
     def test_parse_multiple_json_objects(self, parser):
         """Тест: несколько JSON объектов в ответе
         
@@ -269,6 +272,14 @@ class TestParseAIResponseInvalidJSON:
             if key != "ReplyText":
                 assert value is False
 
+    def test_parse_multiple_json_objects_takes_first_fb_employee(self):
+        """Тест: fb_employee разбирает первый JSON объект через raw_decode"""
+        response = json.dumps({"ReplyText": "Первый"}) + " " + json.dumps({"ReplyText": "Второй"})
+
+        result = parse_fb_employee(response)
+
+        assert result == {"ReplyText": "Первый"}
+
     @pytest.mark.parametrize("parser", ALL_PARSERS)
     def test_parse_json_with_null_values(self, parser):
         """Тест: JSON с null значениями"""
@@ -7,9 +7,10 @@
 Тестируемые компоненты:
 - PostgresFSMStorage класс
 - _normalize_db_url функция
-- Методы: __init__, _connect, _make_key, set_state, get_state, set_data, get_data, close
+- Методы: __init__, _connect, _make_key, set_state, get_state, set_data, get_data, update_data, append_data, close
 """
 
+import json
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from aiogram.fsm.storage.base import StorageKey
@@ -168,6 +169,24 @@ class TestPostgresFSMStorageSetState:
             mock_conn.execute.assert_called_once()
             mock_conn.close.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_set_state_does_not_write_generated_columns(self):
+        """Тест: bot_id/chat_id/user_id вычисляет БД из storage_key"""
+        storage = PostgresFSMStorage("postgresql://test")
+        key = create_storage_key(bot_id=123, chat_id=456, user_id=789)
+        state = MagicMock()
+        state.state = "TestState"
+        
+        with patch("asyncpg.connect") as mock_connect:
+            mock_conn = AsyncMock()
+            mock_connect.return_value = mock_conn
+            
+            await storage.set_state(key, state)
+            
+            query, *params = mock_conn.execute.call_args[0]
+            assert "user_id" not in query
+            assert params == ["123:456:789", "TestState"]
+
     @pytest.mark.asyncio
     async def test_set_state_clear(self):
         """Тест: очистка состояния (state=None)"""
@@ -449,6 +468,153 @@ class TestPostgresFSMStorageGetData:
             mock_conn.close.assert_called_once()
 
 
+class TestPostgresFSMStorageUpdateData:
+    """Тесты для метода update_data"""
+
+    @pytest.mark.asyncio
+    async def test_update_data_single_query_with_partial_payload(self):
+        """Тест: в БД уходят только изменённые ключи, слияние через jsonb ||"""
+        storage = PostgresFSMStorage("postgresql://test")
+        key = create_storage_key()
+
+        with patch("asyncpg.connect") as mock_connect:
+            mock_conn = AsyncMock()
+            mock_row = MagicMock()
+            mock_row.__getitem__ = MagicMock(
+                return_value='{"turn_count": 3, "active_inline_message_id": 42}'
+            )
+            mock_conn.fetchrow = AsyncMock(return_value=mock_row)
+            mock_conn.close = AsyncMock()
+            mock_connect.return_value = mock_conn
+
+            result = await storage.update_data(key, {"active_inline_message_id": 42})
+
+            assert result == {"turn_count": 3, "active_inline_message_id": 42}
+            mock_connect.assert_called_once()
+            query, *params = mock_conn.fetchrow.call_args[0]
+            assert "||" in query
+            assert params == ["123:456:789", '{"active_inline_message_id": 42}']
+            mock_conn.execute.assert_not_called()
+            mock_conn.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_update_data_restores_provd_set(self):
+        """Тест: total_provd_achieved возвращается как set"""
+        storage = PostgresFSMStorage("postgresql://test")
+        key = create_storage_key()
+
+        with patch("asyncpg.connect") as mock_connect:
+            mock_conn = AsyncMock()
+            mock_row = MagicMock()
+            mock_row.__getitem__ = MagicMock(return_value='{"total_provd_achieved": ["Behavior"]}')
+            mock_conn.fetchrow = AsyncMock(return_value=mock_row)
+            mock_conn.close = AsyncMock()
+            mock_connect.return_value = mock_conn
+
+            result = await storage.update_data(key, {"total_provd_achieved": {"Behavior"}})
+
+            assert result["total_provd_achieved"] == {"Behavior"}
+
+    @pytest.mark.asyncio
+    async def test_update_data_no_connection(self):
+        """Тест: без подключения возвращаются переданные данные (сохранённых нет)"""
+        with patch("app.storage.postgres_fsm_storage.Settings") as mock_settings:
+            mock_settings.return_value.DATABASE_URL = None
+            storage = PostgresFSMStorage(None)
+
+            result = await storage.update_data(create_storage_key(), {"test": "value"})
+
+            assert result == {"test": "value"}
+
+    @pytest.mark.asyncio
+    async def test_update_data_exception(self):
+        """Тест: при ошибке записи возвращаются полные данные, а не только изменённые ключи"""
+        storage = PostgresFSMStorage("postgresql://test")
+        key = create_storage_key()
+        stored_row = MagicMock()
+        stored_row.__getitem__ = MagicMock(return_value='{"turn_count": 3, "test": "old"}')
+
+        with patch("asyncpg.connect") as mock_connect:
+            mock_conn = AsyncMock()
+            # Первый запрос — обновление (падает), второй — чтение сохранённых данных
+            mock_conn.fetchrow = AsyncMock(side_effect=[Exception("DB error"), stored_row])
+            mock_conn.close = AsyncMock()
+            mock_connect.return_value = mock_conn
+
+            result = await storage.update_data(key, {"test": "value"})
+
+            assert result == {"turn_count": 3, "test": "value"}
+            assert mock_conn.close.call_count == 2
+
+
+class TestPostgresFSMStorageAppendData:
+    """Тесты для метода append_data"""
+
+    @pytest.mark.asyncio
+    async def test_append_data_sends_only_new_items(self):
+        """Тест: в БД уходят только новые элементы списка и изменённые ключи"""
+        storage = PostgresFSMStorage("postgresql://test")
+        key = create_storage_key()
+        items = [{"role": "Руководитель", "text": "Привет"}]
+
+        with patch("asyncpg.connect") as mock_connect:
+            mock_conn = AsyncMock()
+            mock_conn.execute = AsyncMock()
+            mock_conn.close = AsyncMock()
+            mock_connect.return_value = mock_conn
+
+            await storage.append_data(key, "dialogue_entries", items, {"total_provd_achieved": {"Behavior"}})
+
+            mock_conn.execute.assert_called_once()
+            query, *params = mock_conn.execute.call_args[0]
+            assert "jsonb_set" in query
+            assert params[0] == "123:456:789"
+            assert json.loads(params[1]) == {"total_provd_achieved": ["Behavior"]}
+            assert params[2] == "dialogue_entries"
+            assert json.loads(params[3]) == items
+            mock_conn.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_append_data_no_connection(self):
+        """Тест: дозапись без подключения"""
+        with patch("app.storage.postgres_fsm_storage.Settings") as mock_settings:
+            mock_settings.return_value.DATABASE_URL = None
+            storage = PostgresFSMStorage(None)
+
+            await storage.append_data(create_storage_key(), "dialogue_entries", [])
+
+            # Не должно быть исключений
+
+    @pytest.mark.asyncio
+    async def test_append_data_exception(self):
+        """Тест: при ошибке дозаписи ход сохраняется полной перезаписью данных"""
+        storage = PostgresFSMStorage("postgresql://test")
+        stored_row = MagicMock()
+        stored_row.__getitem__ = MagicMock(
+            return_value='{"turn_count": 1, "dialogue_entries": [{"text": "old"}], "active_inline_message_id": 5}'
+        )
+
+        with patch("asyncpg.connect") as mock_connect:
+            mock_conn = AsyncMock()
+            # Дозапись падает, затем чтение сохранённых данных и полная запись проходят
+            mock_conn.execute = AsyncMock(side_effect=[Exception("DB error"), None])
+            mock_conn.fetchrow = AsyncMock(return_value=stored_row)
+            mock_conn.close = AsyncMock()
+            mock_connect.return_value = mock_conn
+
+            await storage.append_data(
+                create_storage_key(), "dialogue_entries", [{"text": "x"}], {"turn_count": 2}
+            )
+
+            saved = json.loads(mock_conn.execute.call_args_list[1].args[2])
+            assert saved == {
+                "turn_count": 2,
+                "dialogue_entries": [{"text": "old"}, {"text": "x"}],
+                "active_inline_message_id": 5,
+            }
+            assert mock_conn.close.call_count == 3
+
+
 class TestPostgresFSMStorageClose:
     """Тесты для метода close"""
 
@@ -342,7 +342,7 @@ class TestPostgresStorageGetHistory:
             mock_row.__getitem__ = MagicMock(side_effect=lambda key: {
                 "role": "user",
                 "content": "Hello",
-                "metadata": '{"test": "data"}'
+                "meta": '{"test": "data"}'
             }[key])
             mock_conn.fetch = AsyncMock(return_value=[mock_row])
             # Настраиваем pool.acquire() как асинхронный контекстный менеджер
@@ -14,9 +14,12 @@
 - send_reviewer_message функция
 """
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import app.services.ai_service as ai_service
 from app.services.ai_service import (
     initialize_ai_providers,
     get_ai_gateway,
@@ -256,6 +259,49 @@ class TestSendCaseMessage:
             call_kwargs = mock_gateway.send_message.call_args.kwargs
             assert call_kwargs["audio_bytes"] == audio_bytes
 
+    @pytest.mark.asyncio
+    async def test_send_case_message_limits_concurrent_requests(self):
+        """Тест: одновременных запросов к AI не больше AI_MAX_CONCURRENT_REQUESTS"""
+        in_flight = 0
+        max_in_flight = 0
+
+        async def slow_send(**kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return AIResponse(content="Hello", success=True)
+
+        with patch("app.services.ai_service._get_provider_chain") as mock_chain, \
+             patch("app.services.ai_service.gateway") as mock_gateway, \
+             patch("app.services.ai_service._request_semaphore", asyncio.Semaphore(2)):
+            
+            mock_provider_settings = MagicMock()
+            mock_provider_settings.provider = ProviderType.OPENAI
+            mock_provider_settings.model = "gpt-3.5-turbo"
+            mock_chain.return_value = [mock_provider_settings]
+            mock_gateway.send_message = AsyncMock(side_effect=slow_send)
+            
+            results = await asyncio.gather(*(
+                send_case_message(case_id="test_case", channel="dialogue", user_id=user_id, message="Test")
+                for user_id in range(5)
+            ))
+            
+            assert all(result.success for result in results)
+            assert max_in_flight == 2
+
+    def test_request_semaphore_uses_settings_limit(self):
+        """Тест: размер семафора берётся из настроек"""
+        with patch("app.services.ai_service._request_semaphore", None), \
+             patch("app.services.ai_service.Settings") as mock_settings:
+            mock_settings.return_value.AI_MAX_CONCURRENT_REQUESTS = 7
+            
+            semaphore = ai_service._get_request_semaphore()
+            
+            assert semaphore._value == 7
+            assert ai_service._get_request_semaphore() is semaphore
+
 
 class TestClearCaseConversations:
     """Тесты для функции clear_case_conversations"""
@@ -12,6 +12,7 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from io import BytesIO
 
+from app.services import transcription_service
 from app.services.transcription_service import transcribe_voice_ogg
 
 # Добавляем импорт AsyncMock для использования в patch
@@ -22,9 +23,38 @@ def create_test_audio_bytes() -> BytesIO:
     return BytesIO(b"fake audio data")
 
 
+@pytest.fixture(autouse=True)
+def reset_client_cache():
+    """Сбрасывает кэш клиентов OpenAI, чтобы каждый тест получал свой мок"""
+    transcription_service._CLIENTS.clear()
+    yield
+    transcription_service._CLIENTS.clear()
+
+
 class TestTranscribeVoiceOgg:
     """Тесты для функции transcribe_voice_ogg"""
 
+    @pytest.mark.asyncio
+    async def test_transcribe_reuses_client(self):
+        """Тест: клиент OpenAI создаётся один раз и переиспользуется"""
+        with patch("app.services.transcription_service.Settings") as mock_settings, \
+             patch("app.services.transcription_service.OpenAI") as mock_openai_class:
+            
+            mock_settings.return_value.OPENAI_API_KEY = "test-key"
+            mock_settings.return_value.TRANSCRIBE_MAX_RETRIES = 1
+            mock_settings.return_value.TRANSCRIBE_RETRY_BACKOFF_SEC = 1.0
+            mock_settings.return_value.TRANSCRIBE_TIMEOUT_SEC = 30.0
+            
+            mock_client = MagicMock()
+            mock_client.audio.transcriptions.create.return_value = MagicMock(text="Transcribed text")
+            mock_openai_class.return_value = mock_client
+            
+            await transcribe_voice_ogg(create_test_audio_bytes())
+            await transcribe_voice_ogg(create_test_audio_bytes())
+            
+            mock_openai_class.assert_called_once_with(api_key="test-key")
+            assert mock_client.audio.transcriptions.create.call_count == 2
+
     @pytest.mark.asyncio
     async def test_transcribe_success(self):
         """Тест: успешная транскрибация"""